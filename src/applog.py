@@ -0,0 +1,114 @@
+"""Uygulama loglama katmanı.
+
+- Kategori bazlı logger'lar (`dashboard.perf`, `dashboard.data`, `dashboard.ws`, ...);
+  DEBUG seviyesi `DASHBOARD_DEBUG=perf,ws` gibi kategori listesiyle açılır.
+- Mesajlar %-biçimiyle verilir, seviye kapalıysa hiç biçimlendirilmez.
+- Her tick tekrar eden hatalar (DB kesintisinde canlı yayın) `log_rate_limited`
+  ile anahtar başına belirli aralıkta bir kez yazılır, atlananların sayısı
+  mesaja eklenir.
+- Kayıtlar `dashboard` logger'ına bağlı konsol (stderr) handler'ıyla yazılır;
+  uvicorn kök logger'ı ayarlamadığı için bu olmadan yalnızca WARNING ve
+  üstü (logging.lastResort) görünür.
+- `LOG_JSON_PATH` verilirse kayıtlar ayrıca JSON-lines dosyasına yazılır.
+"""
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+
+ROOT = "dashboard"
+# Tekrar eden hata/uyarıların en sık yazılma aralığı (saniye)
+DEFAULT_LOG_INTERVAL = float(os.getenv("LOG_REPEAT_INTERVAL", "300"))
+
+
+def get_logger(category: str) -> logging.Logger:
+    return logging.getLogger(f"{ROOT}.{category}")
+
+
+class JsonLinesFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class _ConsoleHandler(logging.StreamHandler):
+    """setup_logging'in eklediği metin handler'ı (tekrar çağrıda değiştirilir)."""
+
+
+def setup_logging(
+    debug_categories: str | None = None,
+    json_path: str | None = None,
+    level: str | None = None,
+    stream=None,
+):
+    """Kategori seviyelerini, konsol ve isteğe bağlı JSON-lines çıktısını ayarla (tekrar çağrılabilir).
+
+    Metin kayıtları `stream`e (varsayılan stderr) yazılır; kayıtlar kök
+    logger'a aktarılmaz, böylece kök ayarlıysa satırlar iki kez çıkmaz.
+    """
+    debug_categories = os.getenv("DASHBOARD_DEBUG", "") if debug_categories is None else debug_categories
+    json_path = os.getenv("LOG_JSON_PATH") if json_path is None else json_path
+    level = level or os.getenv("LOG_LEVEL", "INFO")
+
+    root = logging.getLogger(ROOT)
+    root.setLevel(level.upper())
+    for category in filter(None, (c.strip() for c in debug_categories.split(","))):
+        get_logger(category).setLevel(logging.DEBUG)
+
+    for handler in [h for h in root.handlers if isinstance(h.formatter, JsonLinesFormatter)]:
+        root.removeHandler(handler)
+        handler.close()
+    for handler in [h for h in root.handlers if isinstance(h, _ConsoleHandler)]:
+        root.removeHandler(handler)
+    console = _ConsoleHandler(stream or sys.stderr)
+    console.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    root.addHandler(console)
+    root.propagate = False
+    if json_path:
+        handler = logging.FileHandler(json_path, encoding="utf-8")
+        handler.setFormatter(JsonLinesFormatter())
+        root.addHandler(handler)
+
+
+class _RateLimiter:
+    def __init__(self):
+        self._last: dict[tuple, float] = {}
+        self._suppressed: dict[tuple, int] = {}
+        self._lock = threading.Lock()
+
+    def allow(self, key: tuple, interval: float) -> tuple[bool, int]:
+        now = time.monotonic()
+        with self._lock:
+            last = self._last.get(key)
+            if last is not None and now - last < interval:
+                self._suppressed[key] = self._suppressed.get(key, 0) + 1
+                return False, 0
+            self._last[key] = now
+            return True, self._suppressed.pop(key, 0)
+
+
+_limiter = _RateLimiter()
+
+
+def log_rate_limited(
+    logger: logging.Logger, level: int, key, msg: str, *args, interval: float = DEFAULT_LOG_INTERVAL
+):
+    """Aynı anahtar için kaydı `interval` saniyede en fazla bir kez yaz."""
+    if not logger.isEnabledFor(level):
+        return
+    allowed, suppressed = _limiter.allow((logger.name, key), interval)
+    if allowed:
+        if suppressed:
+            msg += " (son kayıttan beri %d kez tekrarlandı)"
+            args = (*args, suppressed)
+        logger.log(level, msg, *args)
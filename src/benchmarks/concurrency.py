@@ -0,0 +1,100 @@
+"""Eşzamanlı /hourly-production/ isteklerinde gecikme ve event loop tıkanması.
+
+Yerel SQLite kopyasına her sorguda `--query-delay` kadar gecikme eklenir
+(yavaş MSSQL sorgusu). Aynı anda `--concurrency` istek gönderilir ve event
+loop'un ne kadar süre cevap veremediği ölçülür. `--blocking` ile sorgular
+eski yöntemle doğrudan event loop üzerinde çalıştırılır.
+
+Kullanım (src klasöründen):
+    python -m benchmarks.concurrency
+    python -m benchmarks.concurrency --blocking
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import timedelta
+
+from benchmarks import fixtures
+
+import database
+import main
+
+MODELS = [f"MDL-{i:02d}" for i in range(6)]
+
+
+async def blocking_request(units, start_date, end_date):
+    # Eski davranış: senkron sorgu doğrudan coroutine içinde
+    db = database.SessionLocal()
+    try:
+        return {"data": main.compute_hourly_production(db, units, start_date, end_date)}
+    finally:
+        db.close()
+
+
+async def timed(coro, t0: float) -> float:
+    # Gecikme tüm isteklerin aynı anda geldiği andan itibaren ölçülür
+    response = fixtures.response_json(await coro)
+    assert "error" not in response, response
+    return time.perf_counter() - t0
+
+
+async def watch_loop(stop: asyncio.Event, interval: float = 0.01) -> float:
+    """Event loop'un planlanandan en fazla ne kadar geç uyandığını döndür."""
+    worst = 0.0
+    while not stop.is_set():
+        t0 = time.perf_counter()
+        await asyncio.sleep(interval)
+        worst = max(worst, time.perf_counter() - t0 - interval)
+    return worst
+
+
+async def run(args, units):
+    start = fixtures.BENCH_DATE
+    start_date = start.strftime("%Y-%m-%d %H:%M:%S")
+    end_date = (start + timedelta(hours=12)).strftime("%Y-%m-%d %H:%M:%S")
+
+    stop = asyncio.Event()
+    watcher = asyncio.create_task(watch_loop(stop))
+    # Her ekran farklı bir hattı istiyormuş gibi
+    t0 = time.perf_counter()
+    requests = []
+    for i in range(args.concurrency):
+        unit = [units[i % len(units)]]
+        if args.blocking:
+            requests.append(timed(blocking_request(unit, start_date, end_date), t0))
+        else:
+            requests.append(timed(main.get_hourly_production(
+                fixtures.http_request(), start_date=start_date, end_date=end_date, unit_name=unit
+            ), t0))
+    latencies = await asyncio.gather(*requests)
+    wall = time.perf_counter() - t0
+    stop.set()
+    stall = await watcher
+    return latencies, wall, stall
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--query-delay", type=float, default=0.2)
+    parser.add_argument("--blocking", action="store_true")
+    args = parser.parse_args()
+
+    engine = fixtures.create_local_engine(query_delay=args.query_delay)
+    units = [f"UNIT-{i:02d}" for i in range(10)]
+    fixtures.seed_records(engine, units, MODELS, hours=12, rows_per_hour=60)
+    fixtures.install(engine)
+
+    latencies, wall, stall = asyncio.run(run(args, units))
+    latencies.sort()
+    mode = "blocking (eski)" if args.blocking else f"run_in_db ({database.DB_MAX_WORKERS} iş parçacığı)"
+    print(f"mod: {mode}, eşzamanlı istek: {args.concurrency}, sorgu gecikmesi: {args.query_delay * 1000:.0f} ms")
+    print(f"toplam süre      : {wall * 1000:8.1f} ms")
+    print(f"istek p50        : {statistics.median(latencies) * 1000:8.1f} ms")
+    print(f"istek max        : {latencies[-1] * 1000:8.1f} ms")
+    print(f"en uzun loop duraklaması: {stall * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,246 @@
+"""dbo.ProductRecordLog için yerel SQLite kopyası.
+
+Benchmark'lar canlı MSSQL sunucusuna ihtiyaç duymadan `src` klasöründen
+çalıştırılır, örn. `python -m benchmarks.hourly_production`. Tam ölçüm
+seti için `python -m benchmarks.suite`.
+"""
+import os
+
+# database.py içe aktarılırken MSSQL sürücüsü aranmasın
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import contextlib
+import json
+import random
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, event, text
+from starlette.requests import Request
+
+import database
+import migrations
+
+BENCH_DATE = datetime(2025, 1, 6)
+
+
+def create_local_engine(directory: str | None = None, query_delay: float = 0.0):
+    """`dbo` şemasını ayrı bir dosya olarak bağlayan SQLite engine oluştur.
+
+    `query_delay` her sorguya eklenen gecikmedir (saniye); ağ üzerindeki
+    MSSQL sunucusunu taklit etmek için kullanılır.
+    """
+    directory = directory or tempfile.mkdtemp(prefix="dashboard-bench-")
+    dbo_path = os.path.join(directory, "dbo.sqlite")
+    engine = create_engine(
+        f"sqlite:///{os.path.join(directory, 'main.sqlite')}",
+        connect_args={"check_same_thread": False},
+    )
+
+    @event.listens_for(engine, "connect")
+    def _attach_dbo(dbapi_connection, connection_record):
+        dbapi_connection.execute("ATTACH DATABASE ? AS dbo", (dbo_path,))
+
+    if query_delay:
+        @event.listens_for(engine, "before_cursor_execute")
+        def _delay(conn, cursor, statement, parameters, context, executemany):
+            time.sleep(query_delay)
+
+    with engine.begin() as conn:
+        conn.execute(text("""
+            CREATE TABLE IF NOT EXISTS dbo.ProductRecordLog (
+                UnitName TEXT NOT NULL,
+                KayitTarihi TEXT NOT NULL,
+                Model TEXT,
+                ModelSuresiSN INTEGER,
+                TestSonucu INTEGER
+            )
+        """))
+        # Model tanım tablosu (cycle_times.MODELS_TABLE)
+        conn.execute(text("""
+            CREATE TABLE IF NOT EXISTS dbo.ProductRecordLogModels (
+                Model TEXT PRIMARY KEY,
+                ModelSuresiSN INTEGER
+            )
+        """))
+    # Üretimdeki indekslerin karşılığı (migrations.py)
+    migrations.upgrade(engine)
+    return engine
+
+
+def seed_records(
+    engine,
+    units: list[str],
+    models: list[str],
+    start: datetime = BENCH_DATE,
+    hours: int = 12,
+    rows_per_hour: int = 60,
+    pass_rate: float = 0.97,
+    seed: int = 0,
+    until: datetime | None = None,
+) -> int:
+    """Her hat ve saat için rastgele üretim kaydı ekle, eklenen satır sayısını döndür.
+
+    `until` verilirse bu andan sonraya düşen kayıtlar eklenmez (canlı senaryolar).
+    """
+    rng = random.Random(seed)
+    cycle_times = _cycle_times(rng, models)
+    _define_models(engine, cycle_times)
+    rows = []
+    for unit in units:
+        for h in range(hours):
+            hour_start = start + timedelta(hours=h)
+            for _ in range(rows_per_hour):
+                model = rng.choice(models)
+                ts = hour_start + timedelta(seconds=rng.randrange(3600))
+                if until is not None and ts > until:
+                    continue
+                rows.append({
+                    "unit": unit,
+                    "ts": ts.strftime("%Y-%m-%d %H:%M:%S"),
+                    "model": model,
+                    "cycle": cycle_times[model],
+                    "result": 1 if rng.random() < pass_rate else 0,
+                })
+    _insert(engine, rows)
+    return len(rows)
+
+
+def _cycle_times(rng: random.Random, models: list[str]) -> dict[str, int]:
+    # Aynı seed ile geçmiş ve canlı kayıtlarda modellerin çevrim süreleri aynı
+    return {model: rng.randint(30, 120) for model in models}
+
+
+def _define_models(engine, cycle_times: dict[str, int]):
+    with engine.begin() as conn:
+        conn.execute(
+            text("INSERT OR REPLACE INTO dbo.ProductRecordLogModels (Model, ModelSuresiSN) VALUES (:model, :cycle)"),
+            [{"model": model, "cycle": cycle} for model, cycle in cycle_times.items()],
+        )
+
+
+def _insert(engine, rows: list[dict]):
+    if not rows:
+        return
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                "INSERT INTO dbo.ProductRecordLog (UnitName, KayitTarihi, Model, ModelSuresiSN, TestSonucu) "
+                "VALUES (:unit, :ts, :model, :cycle, :result)"
+            ),
+            rows,
+        )
+
+
+def seed_recent(
+    engine,
+    units: list[str],
+    models: list[str],
+    hours: int = 12,
+    rows_per_hour: int = 60,
+    pass_rate: float = 0.97,
+    seed: int = 0,
+    now: datetime | None = None,
+) -> tuple[datetime, int]:
+    """Şimdiki saat dahil son `hours` saati doldur; (ilk saat, kayıt sayısı) döndür.
+
+    Canlı yayın ve açık aralık senaryoları için; şimdiden sonraya kayıt yazılmaz.
+    """
+    now = now or datetime.now()
+    start = now.replace(minute=0, second=0, microsecond=0) - timedelta(hours=hours - 1)
+    rows = seed_records(engine, units, models, start, hours, rows_per_hour, pass_rate, seed, until=now)
+    return start, rows
+
+
+def insert_live_records(
+    engine, units: list[str], models: list[str], rows_per_unit: int = 1, pass_rate: float = 0.97,
+    seed: int = 0, rng: random.Random | None = None,
+) -> int:
+    """Her hatta şu ana damgalı `rows_per_unit` kayıt ekle; çalışan hattı taklit eder."""
+    cycle_times = _cycle_times(random.Random(seed), models)
+    rng = rng or random.Random()
+    ts = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    rows = []
+    for unit in units:
+        for _ in range(rows_per_unit):
+            model = rng.choice(models)
+            rows.append({
+                "unit": unit,
+                "ts": ts,
+                "model": model,
+                "cycle": cycle_times[model],
+                "result": 1 if rng.random() < pass_rate else 0,
+            })
+    _insert(engine, rows)
+    return len(rows)
+
+
+def install(engine):
+    """Uygulamanın oturumlarını verilen engine'e yönlendir."""
+    database.engine = engine
+    database.read_engine = engine
+    database.SessionLocal.configure(bind=engine)
+    database.ReadSessionLocal.configure(bind=engine)
+
+
+def http_request(headers: dict | None = None) -> Request:
+    """Endpoint'leri doğrudan çağırmak için boş bir HTTP isteği."""
+    raw_headers = [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()]
+    return Request({"type": "http", "method": "GET", "path": "/", "query_string": b"", "headers": raw_headers})
+
+
+def response_json(response) -> dict:
+    """Endpoint dönüşünü (dict ya da JSONResponse) sözlüğe çevir."""
+    return json.loads(response.body) if hasattr(response, "body") else response
+
+
+def percentile(values: list[float], q: float) -> float:
+    """Sıralı olmayan listeden yüzdelik (q: 0-100), en yakın sıra yöntemiyle."""
+    ordered = sorted(values)
+    if not ordered:
+        return float("nan")
+    return ordered[min(len(ordered) - 1, max(0, int(round(q / 100 * len(ordered))) - 1))]
+
+
+@contextlib.contextmanager
+def serve(app, port: int = 0):
+    """Uygulamayı aynı süreçte, ayrı bir iş parçacığında uvicorn ile çalıştır.
+
+    "host:port" döndürür; port 0 ise boş bir port seçilir.
+    """
+    import uvicorn
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        if not thread.is_alive():
+            raise RuntimeError("uvicorn başlatılamadı")
+        time.sleep(0.05)
+    host, port = server.servers[0].sockets[0].getsockname()[:2]
+    try:
+        yield f"{host}:{port}"
+    finally:
+        server.should_exit = True
+        thread.join(timeout=10)
+
+
+class QueryCounter:
+    """Engine üzerinden geçen sorguları (round-trip) say."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+    def __enter__(self):
+        self.count = 0
+        event.listen(self.engine, "before_cursor_execute", self._on_execute)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, "before_cursor_execute", self._on_execute)
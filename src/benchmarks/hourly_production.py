@@ -0,0 +1,64 @@
+"""/hourly-production/ için round-trip ve gecikme ölçümü.
+
+Kullanım (src klasöründen):
+    python -m benchmarks.hourly_production
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import timedelta
+
+from benchmarks import fixtures
+
+import main
+
+MODELS = [f"MDL-{i:02d}" for i in range(8)]
+
+
+def run_endpoint(units: list[str], hours: int) -> dict:
+    start = fixtures.BENCH_DATE
+    end = start + timedelta(hours=hours)
+    return fixtures.response_json(asyncio.run(main.get_hourly_production(
+        fixtures.http_request(),
+        start_date=start.strftime("%Y-%m-%dT%H:%M:%S"),
+        end_date=end.strftime("%Y-%m-%dT%H:%M:%S"),
+        unit_name=units,
+    )))
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--max-units", type=int, default=20)
+    parser.add_argument("--rows-per-hour", type=int, default=120)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--query-delay", type=float, default=0.002,
+                        help="Sorgu başına eklenen gecikme (MSSQL ağ gecikmesi)")
+    parser.add_argument("--warm-cache", action="store_true",
+                        help="Kapanmış saat önbelleğini istekler arasında temizleme")
+    args = parser.parse_args()
+
+    engine = fixtures.create_local_engine(query_delay=args.query_delay)
+    units = [f"UNIT-{i:02d}" for i in range(args.max_units)]
+    rows = fixtures.seed_records(engine, units, MODELS, hours=12, rows_per_hour=args.rows_per_hour)
+    fixtures.install(engine)
+    print(f"{rows} kayıt oluşturuldu, sorgu gecikmesi {args.query_delay * 1000:.1f} ms")
+    print(f"{'hat':>4} {'saat':>5} {'sorgu':>6} {'medyan ms':>10}")
+
+    for unit_count in (1, 5, 10, args.max_units):
+        for hours in (4, 8, 12):
+            timings = []
+            with fixtures.QueryCounter(engine) as counter:
+                for _ in range(args.repeat):
+                    if not args.warm_cache:
+                        main.hour_cache.clear()
+                    t0 = time.perf_counter()
+                    response = run_endpoint(units[:unit_count], hours)
+                    timings.append(time.perf_counter() - t0)
+            assert "error" not in response, response
+            print(f"{unit_count:>4} {hours:>5} {counter.count // args.repeat:>6} "
+                  f"{statistics.median(timings) * 1000:>10.1f}")
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,85 @@
+"""Loglama açık/kapalıyken /hourly-production/ ve canlı yayın süresi.
+
+Kapanmış saat önbelleği sıcak tutulur; böylece ölçülen süre büyük oranda
+hesap + loglama maliyetidir. Loglar geçici bir dosyaya yazılır.
+
+Kullanım (src klasöründen):
+    python -m benchmarks.logging_overhead
+"""
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import tempfile
+import time
+from datetime import timedelta
+
+from benchmarks import fixtures
+
+import applog
+import main
+
+MODELS = [f"MDL-{i:02d}" for i in range(8)]
+
+SCENARIOS = [
+    ("kapalı", {"level": "CRITICAL", "debug_categories": "", "json_path": ""}),
+    ("INFO (üretim)", {"level": "INFO", "debug_categories": "", "json_path": ""}),
+    ("DEBUG data,ws,perf", {"level": "INFO", "debug_categories": "data,ws,perf,ingest", "json_path": ""}),
+    ("DEBUG + JSON-lines", {"level": "INFO", "debug_categories": "data,ws,perf,ingest", "json_path": None}),
+]
+
+
+def reset_categories():
+    for category in ("data", "ws", "perf", "ingest", "app"):
+        applog.get_logger(category).setLevel(logging.NOTSET)
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--units", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    engine = fixtures.create_local_engine()
+    units = [f"UNIT-{i:02d}" for i in range(args.units)]
+    fixtures.seed_records(engine, units, MODELS, hours=12, rows_per_hour=60)
+    fixtures.install(engine)
+
+    log_dir = tempfile.mkdtemp(prefix="dashboard-log-")
+    # Uygulamanın konsol handler'ı terminal yerine dosyaya yazar
+    text_log = open(os.path.join(log_dir, "app.log"), "w", encoding="utf-8")
+
+    start = fixtures.BENCH_DATE
+    params = {
+        "start_date": start.strftime("%Y-%m-%dT%H:%M:%S"),
+        "end_date": (start + timedelta(hours=12)).strftime("%Y-%m-%dT%H:%M:%S"),
+        "unit_name": units,
+    }
+    asyncio.run(main.get_hourly_production(fixtures.http_request(), **params))  # önbelleği ısıt
+
+    print(f"{'senaryo':<22} {'medyan ms':>10} {'p99 ms':>8}")
+    for name, config in SCENARIOS:
+        reset_categories()
+        if config["json_path"] is None:
+            config = {**config, "json_path": os.path.join(log_dir, "app.jsonl")}
+        applog.setup_logging(**config, stream=text_log)
+
+        async def run():
+            timings = []
+            for _ in range(args.repeat):
+                t0 = time.perf_counter()
+                await main.get_hourly_production(fixtures.http_request(), **params)
+                timings.append(time.perf_counter() - t0)
+            return timings
+
+        timings = sorted(asyncio.run(run()))
+        p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+        print(f"{name:<22} {statistics.median(timings) * 1000:>10.2f} {p99 * 1000:>8.2f}")
+
+    text_log.close()
+    print(f"log dosyaları: {log_dir}")
+
+
+if __name__ == "__main__":
+    main_cli()
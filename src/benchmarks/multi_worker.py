@@ -0,0 +1,137 @@
+"""Çok işçili canlı yayın: FANOUT_ENABLED açık / kapalı DB yoklaması ve gecikme.
+
+`uvicorn --workers N` yerine N ayrı süreç aynı SQLite kopyasını paylaşarak
+ayrı portlarda çalıştırılır (fanout açısından aynıdır). Her işçiye
+`--clients-per-worker` ekran bağlanır, besleyici canlı kayıt yazar. Rollup
+açıktır ve kısa aralıkla yenilenir. Sonda her işçinin /metrics çıktısından
+canlı yayın (production_since), rollup yazma (rollup_refresh) ve katalog
+(unit_models) sorgu sayıları okunur: fanout açıkken yalnızca lider sorgu
+yapmalıdır.
+
+Kullanım (src klasöründen):
+    python -m benchmarks.multi_worker --workers 4
+"""
+import argparse
+import asyncio
+import http.client
+import multiprocessing
+import os
+import re
+import socket
+import tempfile
+import time
+
+from benchmarks import fixtures, ws_load
+
+QUERIES = ("production_since", "rollup_refresh", "unit_models")
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def worker(directory: str, port: int, env: dict):
+    os.environ.update(env)
+    import uvicorn
+
+    import main
+
+    fixtures.install(fixtures.create_local_engine(directory))
+    uvicorn.run(main.app, host="127.0.0.1", port=port, log_level="warning")
+
+
+def wait_ready(port: int, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            connection.request("GET", "/pool-stats")
+            if connection.getresponse().status == 200:
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"işçi {port} başlamadı")
+
+
+def query_counts(port: int) -> dict[str, int]:
+    connection = http.client.HTTPConnection("127.0.0.1", port)
+    connection.request("GET", "/metrics")
+    text = connection.getresponse().read().decode()
+    counts = {}
+    for query in QUERIES:
+        match = re.search(rf'^dashboard_db_query_seconds_count\{{query="{query}"\}} (\d+)', text, re.M)
+        counts[query] = int(match.group(1)) if match else 0
+    return counts
+
+
+def run(args, fanout: bool) -> dict:
+    directory = tempfile.mkdtemp(prefix="dashboard-bench-")
+    engine = fixtures.create_local_engine(directory)
+    units = [f"UNIT-{i:02d}" for i in range(args.units)]
+    fixtures.seed_recent(engine, units, ws_load.MODELS, hours=2, rows_per_hour=args.rows_per_hour)
+
+    env = {
+        "LIVE_TICK_SECONDS": str(args.tick),
+        "ROLLUP_ENABLED": "1",  # ws_load varsayılan olarak kapatır
+        "ROLLUP_INTERVAL": str(args.rollup_interval),
+        "FANOUT_ENABLED": "1" if fanout else "0",
+        "FANOUT_PORT": str(free_port()),
+    }
+    ports = [free_port() for _ in range(args.workers)]
+    context = multiprocessing.get_context("spawn")
+    processes = [context.Process(target=worker, args=(directory, port, env), daemon=True) for port in ports]
+    for process in processes:
+        process.start()
+    try:
+        for port in ports:
+            wait_ready(port)
+        feeder = ws_load.Feeder(engine, units, ws_load.MODELS, args.feed_interval)
+
+        async def load():
+            return await asyncio.gather(*(
+                ws_load.run_load(
+                    f"ws://127.0.0.1:{port}/ws/production", args.clients_per_worker, args.duration,
+                    units, args.units_per_client, feeder if i == 0 else None, seed=i,
+                )
+                for i, port in enumerate(ports)
+            ))
+
+        summaries = asyncio.run(load())
+        counts = [query_counts(port) for port in ports]
+    finally:
+        for process in processes:
+            process.terminate()
+            process.join()
+    queries = {query: [c[query] for c in counts] for query in QUERIES}
+    return {"summary": summaries[0], "queries": queries, "failed": sum(s["failed"] for s in summaries)}
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--clients-per-worker", type=int, default=25)
+    parser.add_argument("--units", type=int, default=20)
+    parser.add_argument("--units-per-client", type=int, default=3)
+    parser.add_argument("--rows-per-hour", type=int, default=120)
+    parser.add_argument("--tick", type=float, default=1)
+    parser.add_argument("--feed-interval", type=float, default=2.5)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--rollup-interval", type=float, default=2)
+    args = parser.parse_args()
+
+    print(f"{args.workers} işçi x {args.clients_per_worker} ekran, {args.duration:.0f} sn, tick {args.tick} sn, "
+          f"rollup {args.rollup_interval} sn")
+    print(f"{'fanout':<8} {'sorgu':<18} {'işçi başına':<28} {'toplam':>7}")
+    for fanout in (False, True):
+        result = run(args, fanout)
+        summary = result["summary"]
+        name = "açık" if fanout else "kapalı"
+        for query, per_worker in result["queries"].items():
+            print(f"{name:<8} {query:<18} {str(per_worker):<28} {sum(per_worker):>7}")
+        print(f"{name:<8} gecikme p50/p99 ms: {summary['latency_p50_ms']} / {summary['latency_p99_ms']}, "
+              f"kopan: {result['failed']}")
+
+if __name__ == "__main__":
+    main_cli()
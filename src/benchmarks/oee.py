@@ -0,0 +1,122 @@
+"""oee.hourly_metrics ile eski iç içe döngülerin karşılaştırması.
+
+Sentetik olarak aylarca süren (hat, gün, saat, model) verisi üretilir; her
+(gün, saat) ayrı bir satır olacak şekilde iki yöntem aynı girdiyle çalışır.
+
+Kullanım (src klasöründen):
+    python -m benchmarks.oee --months 3
+"""
+import argparse
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+import crud
+import oee
+
+START = datetime(2025, 1, 1)
+
+
+def synthetic_buckets(units: int, days: int, models: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    cycle = rng.integers(30, 120, size=models)
+    # MDL-00 hedefsiz (katalogda yok)
+    targets = {f"MDL-{m:02d}": int(cycle[m]) for m in range(1, models)}
+    rows = []
+    for u in range(units):
+        unit = f"UNIT-{u:02d}"
+        for d in range(days):
+            for h in range(24):
+                bucket_start = START + timedelta(days=d, hours=h)
+                day = bucket_start.strftime("%Y-%m-%d")
+                bucket = {"date": day, "hour": h, "models": []}
+                for m in rng.choice(models, size=3, replace=False):
+                    count = int(rng.integers(10, 60))
+                    fail = int(rng.integers(0, 3))
+                    # crud.ModelRow
+                    bucket["models"].append((unit, day, h, f"MDL-{m:02d}", count, count - fail, fail))
+                rows.append((unit, bucket_start, bucket))
+    return rows, targets
+
+
+def calculate_elapsed_seconds(hour: int, base_date: datetime, now: datetime | None = None) -> int:
+    """Verilen saat için o ana kadar geçen süreyi saniye cinsinden döndür."""
+    now = now or datetime.now()
+    start_of_hour = datetime.combine(base_date.date(), datetime.min.time()) + timedelta(hours=hour)
+    if now >= start_of_hour + timedelta(hours=1):
+        return 3600
+    elif now < start_of_hour:
+        return 0
+    else:
+        return int((now - start_of_hour).total_seconds())
+
+
+def legacy_loops(rows, targets, now):
+    """Vektörleştirmeden önceki /hourly-production/ hesabı (referans)."""
+    result = []
+    for unit, bucket_start, bucket in rows:
+        models = bucket["models"]
+        total = sum(m[4] for m in models)
+        success = sum(m[5] for m in models)
+        fail = sum(m[6] for m in models)
+        quality = (success / total) if total > 0 else 0
+        elapsed_seconds = calculate_elapsed_seconds(bucket["hour"], bucket_start, now)
+        total_performance = 0
+        for m in models:
+            target = targets.get(m[3], 0)
+            if target and target > 0 and elapsed_seconds > 0:
+                total_performance += (m[4] * (3600 / target)) / elapsed_seconds
+        result.append((unit, total, success, fail, quality, total_performance, quality * total_performance))
+    return result
+
+
+def per_bucket_columns(columns, rows):
+    # Her (gün, saat) ayrı grup olsun diye hat/saat yerine sıra numarası kullanılır
+    offsets = np.repeat(np.arange(len(rows)), [len(b["models"]) for _, _, b in rows])
+    columns = dict(columns)
+    columns["unit"] = (offsets // oee.HOURS_PER_DAY).astype(str).astype(object)
+    columns["hour"] = offsets % oee.HOURS_PER_DAY
+    return columns
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--units", type=int, default=20)
+    parser.add_argument("--months", type=int, default=1)
+    parser.add_argument("--models", type=int, default=12)
+    args = parser.parse_args()
+
+    rows, targets = synthetic_buckets(args.units, 30 * args.months, args.models)
+    now = START + timedelta(days=30 * args.months + 1)
+    print(f"{len(rows)} saat, {sum(len(b['models']) for _, _, b in rows)} model satırı")
+
+    t0 = time.perf_counter()
+    expected = legacy_loops(rows, targets, now)
+    legacy = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    model_rows = crud.bucket_rows(bucket for _, _, bucket in rows)
+    columns = oee.columns_from_rows(model_rows, lambda m: targets.get(m, 0), now)
+    convert = time.perf_counter() - t0
+    bucket_columns = per_bucket_columns(columns, rows)
+    t0 = time.perf_counter()
+    hourly = oee.hourly_metrics(bucket_columns)
+    vectorized = time.perf_counter() - t0
+
+    assert np.allclose(hourly["performance"], [r[5] for r in expected])
+    assert np.allclose(hourly["oee"], [r[6] for r in expected])
+    assert np.allclose(hourly["total"], [r[1] for r in expected])
+
+    t0 = time.perf_counter()
+    oee.shift_metrics(oee.hourly_metrics(columns))
+    merged = time.perf_counter() - t0
+
+    print(f"eski döngüler              : {legacy * 1000:8.1f} ms")
+    print(f"sütunlara çevirme          : {convert * 1000:8.1f} ms")
+    print(f"vektörel saatlik hesap     : {vectorized * 1000:8.1f} ms")
+    print(f"saat bazlı + vardiya özeti : {merged * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,117 @@
+"""20 hat x 12 saatlik yük için kodlama süresi ve hattaki bayt sayısı.
+
+Karşılaştırılanlar:
+- FastAPI varsayılanı (jsonable_encoder + json.dumps)
+- stdlib json (kompakt)
+- encoding.dumps (orjson kuruluysa orjson)
+
+Bayt sayıları ham, gzip (GZipMiddleware, seviye 5) ve permessage-deflate
+(ham deflate; ilk mesaj ve bağlam korunarak gönderilen ikinci mesaj) için
+verilir.
+
+Kullanım (src klasöründen):
+    python -m benchmarks.payload_encoding
+"""
+import argparse
+import gzip
+import json
+import statistics
+import time
+import zlib
+from datetime import timedelta
+
+from fastapi.encoders import jsonable_encoder
+
+from benchmarks import fixtures
+
+import encoding
+import main
+
+MODELS = [f"MDL-{i:02d}" for i in range(8)]
+
+
+def timed(fn, payload, repeat: int) -> tuple[float, bytes]:
+    timings = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        body = fn(payload)
+        timings.append(time.perf_counter() - t0)
+    return statistics.median(timings), body
+
+
+def deflate_stream(messages: list[bytes]) -> list[int]:
+    """permessage-deflate (context takeover) ile her mesajın sıkıştırılmış boyutu."""
+    compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15)
+    sizes = []
+    for message in messages:
+        data = compressor.compress(message) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        sizes.append(len(data) - 4)  # sondaki 00 00 ff ff gönderilmez
+    return sizes
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--units", type=int, default=20)
+    parser.add_argument("--hours", type=int, default=12)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    engine = fixtures.create_local_engine()
+    units = [f"UNIT-{i:02d}" for i in range(args.units)]
+    fixtures.seed_records(engine, units, MODELS, hours=args.hours, rows_per_hour=60)
+    fixtures.install(engine)
+
+    start = fixtures.BENCH_DATE
+    db = main.database.SessionLocal()
+    try:
+        data = main.compute_hourly_production(
+            db,
+            units,
+            start.strftime("%Y-%m-%d %H:%M:%S"),
+            (start + timedelta(hours=args.hours)).strftime("%Y-%m-%d %H:%M:%S"),
+        )
+    finally:
+        db.close()
+    payload = {"data": data}
+    rows = sum(len(entries) for entries in data.values())
+    print(f"{args.units} hat x {args.hours} saat = {rows} satır, kodlayıcı: {encoding.BACKEND}")
+
+    encoders = [
+        ("FastAPI varsayılanı", lambda p: json.dumps(
+            jsonable_encoder(p), ensure_ascii=False, allow_nan=False, separators=(",", ":")
+        ).encode("utf-8")),
+        ("json (kompakt)", lambda p: json.dumps(p, ensure_ascii=False, separators=(",", ":")).encode("utf-8")),
+        (f"encoding.dumps ({encoding.BACKEND})", encoding.dumps),
+    ]
+    print(f"{'kodlayıcı':<26} {'medyan µs':>10} {'bayt':>8}")
+    body = b""
+    for name, fn in encoders:
+        seconds, body = timed(fn, payload, args.repeat)
+        print(f"{name:<26} {seconds * 1e6:>10.1f} {len(body):>8}")
+
+    gzipped = gzip.compress(body, compresslevel=5)
+    t0 = time.perf_counter()
+    for _ in range(args.repeat):
+        gzip.compress(body, compresslevel=5)
+    gzip_us = (time.perf_counter() - t0) / args.repeat * 1e6
+
+    # Canlı yayında tipik ikinci mesaj: tek saatin değiştiği bir patch
+    snapshot = encoding.dumps({"type": "snapshot", "v": 1, "seq": 1, "data": data})
+    patch = encoding.dumps({
+        "type": "patch", "v": 1, "seq": 2, "prev": 1,
+        "data": {unit: entries[-1:] for unit, entries in data.items()},
+    })
+    snapshot_deflate, patch_deflate = deflate_stream([snapshot, patch])
+
+    print()
+    print(f"{'hattaki boyut':<34} {'bayt':>8}")
+    print(f"{'HTTP ham':<34} {len(body):>8}")
+    print(f"{'HTTP gzip (seviye 5, ' + f'{gzip_us:.0f} µs)':<34} {len(gzipped):>8}")
+    print(f"{'WS snapshot ham':<34} {len(snapshot):>8}")
+    print(f"{'WS snapshot permessage-deflate':<34} {snapshot_deflate:>8}")
+    print(f"{'WS patch ham':<34} {len(patch):>8}")
+    print(f"{'WS patch permessage-deflate':<34} {patch_deflate:>8}")
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,205 @@
+"""Tekrarlanabilir ölçüm seti: her performans değişikliği bu taban çizgisine göre değerlendirilir.
+
+1. Sentetik ProductRecordLog verisi (hat, model, saatlik kayıt, başarı oranı
+   ayarlanabilir, sabit seed) yerel SQLite kopyasına yazılır; son `--hours`
+   saat şimdiki saat dahil doldurulur.
+2. Uygulama aynı süreçte uvicorn ile çalıştırılır (GZip, ETag ve WebSocket
+   katmanları dahil gerçek yığın).
+3. /hourly-production/ senaryoları: kapanmış saatler soğuk / sıcak önbellek,
+   304 yeniden doğrulama ve şimdiki saati içeren açık aralık. Her biri için
+   p50/p99 gecikme, istek başına sorgu ve tracemalloc tepe belleği.
+4. /ws/production: ws_load ile `--clients` ekran, canlı kayıt besleyicisiyle.
+
+Kullanım (src klasöründen):
+    python -m benchmarks.suite
+    python -m benchmarks.suite --units 40 --rows-per-hour 240 --clients 200 --json taban.json
+    python -m benchmarks.suite --compare taban.json
+"""
+import os
+
+# main içe aktarılmadan önce: kısa canlı tick, rollup kapalı (ROLLUP_ENABLED=1 ile karşılaştırılabilir)
+os.environ.setdefault("LIVE_TICK_SECONDS", "1")
+os.environ.setdefault("ROLLUP_ENABLED", "0")
+
+import argparse
+import http.client
+import json
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from urllib.parse import urlencode
+
+from benchmarks import fixtures, ws_load
+
+import main
+
+
+def hourly_path(units: list[str], start: datetime, end: datetime) -> str:
+    query = urlencode(
+        [("start_date", start.strftime("%Y-%m-%dT%H:%M:%S")), ("end_date", end.strftime("%Y-%m-%dT%H:%M:%S"))]
+        + [("unit_name", unit) for unit in units]
+    )
+    return f"/hourly-production/?{query}"
+
+
+class Scenario:
+    """Aynı isteği tekrar tekrar gönderen HTTP senaryosu."""
+
+    def __init__(self, name: str, path: str, cold: bool = False, revalidate: bool = False):
+        self.name = name
+        self.path = path
+        # Her istekten önce kapanmış saat önbelleğini boşalt
+        self.cold = cold
+        # İlk cevabın ETag'iyle If-None-Match gönder
+        self.revalidate = revalidate
+
+    def request(self, connection: http.client.HTTPConnection, headers: dict) -> tuple[int, bytes, str | None]:
+        if self.cold:
+            main.hour_cache.clear()
+        connection.request("GET", self.path, headers=headers)
+        response = connection.getresponse()
+        return response.status, response.read(), response.getheader("ETag")
+
+    def run(self, address: str, engine, repeat: int) -> dict:
+        connection = http.client.HTTPConnection(address)
+        headers = {"Accept-Encoding": "gzip"}
+        status, body, etag = self.request(connection, headers)  # ısınma
+        assert status == 200, (status, body[:200])
+        if self.revalidate:
+            headers["If-None-Match"] = etag
+        expected = 304 if self.revalidate else 200
+
+        timings = []
+        with fixtures.QueryCounter(engine) as counter:
+            for _ in range(repeat):
+                t0 = time.perf_counter()
+                status, body, _ = self.request(connection, headers)
+                timings.append(time.perf_counter() - t0)
+                assert status == expected, (status, body[:200])
+
+        # Bellek ayrı turda: tracemalloc gecikmeyi şişirir
+        tracemalloc.start()
+        try:
+            for _ in range(min(repeat, 5)):
+                self.request(connection, headers)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        connection.close()
+        return {
+            "p50_ms": round(fixtures.percentile(timings, 50) * 1000, 2),
+            "p99_ms": round(fixtures.percentile(timings, 99) * 1000, 2),
+            "queries": round(counter.count / repeat, 1),
+            "peak_kb": round(peak / 1024),
+            "bytes": len(body),
+        }
+
+
+def http_scenarios(units: list[str], start: datetime, now: datetime) -> list[Scenario]:
+    closed_end = now.replace(minute=0, second=0, microsecond=0)
+    open_end = closed_end + timedelta(hours=1)
+    scenarios = []
+    for count in sorted({1, len(units)}):
+        subset = units[:count]
+        closed = hourly_path(subset, start, closed_end)
+        scenarios += [
+            Scenario(f"{count} hat, kapalı saatler, soğuk", closed, cold=True),
+            Scenario(f"{count} hat, kapalı saatler, sıcak", closed),
+            Scenario(f"{count} hat, kapalı saatler, 304", closed, revalidate=True),
+            Scenario(f"{count} hat, açık aralık (şimdi)", hourly_path(subset, start, open_end)),
+        ]
+    return scenarios
+
+
+def ws_scenario(engine, address: str, units: list[str], models: list[str], args) -> dict:
+    feeder = ws_load.Feeder(engine, units, models, args.feed_interval)
+    tracemalloc.start()
+    try:
+        summary = ws_load.serve_load(main, engine, f"ws://{address}/ws/production", units, feeder, args)
+        summary["peak_kb"] = round(tracemalloc.get_traced_memory()[1] / 1024)
+    finally:
+        tracemalloc.stop()
+    return summary
+
+
+def compare(results: dict, baseline: dict):
+    """Ortak anahtarlar için taban çizgisine göre yüzde değişim."""
+    print()
+    print("taban çizgisine göre değişim (+ kötüleşme, gecikme/sorgu/bellek):")
+    for section in ("http", "ws"):
+        for name, values in results.get(section, {}).items():
+            old = baseline.get(section, {}).get(name)
+            if not old:
+                continue
+            deltas = []
+            for key, value in values.items():
+                base = old.get(key)
+                if isinstance(value, (int, float)) and isinstance(base, (int, float)) and base:
+                    deltas.append(f"{key} {(value - base) / base * 100:+.0f}%")
+            print(f"  {name}: {', '.join(deltas)}")
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--units", type=int, default=20)
+    parser.add_argument("--models", type=int, default=8)
+    parser.add_argument("--hours", type=int, default=12)
+    parser.add_argument("--rows-per-hour", type=int, default=120)
+    parser.add_argument("--pass-rate", type=float, default=0.97)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--query-delay", type=float, default=0.0,
+                        help="Sorgu başına eklenen gecikme (MSSQL ağ gecikmesi)")
+    parser.add_argument("--data-dir", help="SQLite dosyalarının yazılacağı boş klasör (varsayılan: geçici)")
+    parser.add_argument("--repeat", type=int, default=30)
+    parser.add_argument("--clients", type=int, default=100)
+    parser.add_argument("--units-per-client", type=int, default=3)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--feed-interval", type=float, default=2.5)
+    parser.add_argument("--skip-ws", action="store_true")
+    parser.add_argument("--json", help="Sonuçları bu dosyaya yaz")
+    parser.add_argument("--compare", help="Önceki --json çıktısıyla karşılaştır")
+    args = parser.parse_args()
+
+    if args.data_dir:
+        os.makedirs(args.data_dir, exist_ok=True)
+    engine = fixtures.create_local_engine(args.data_dir, query_delay=args.query_delay)
+    units = [f"UNIT-{i:02d}" for i in range(args.units)]
+    models = [f"MDL-{i:02d}" for i in range(args.models)]
+    now = datetime.now()
+    start, rows = fixtures.seed_recent(
+        engine, units, models, args.hours, args.rows_per_hour, args.pass_rate, args.seed, now
+    )
+    fixtures.install(engine)
+    print(f"{rows} kayıt: {args.units} hat x {args.models} model x {args.hours} saat, "
+          f"sorgu gecikmesi {args.query_delay * 1000:.1f} ms")
+
+    results = {"params": vars(args), "http": {}, "ws": {}}
+    with fixtures.serve(main.app) as address:
+        while not (main.unit_catalog.loaded and main.model_cycle_times.loaded):
+            time.sleep(0.05)
+
+        print()
+        print(f"{'/hourly-production/':<36} {'p50 ms':>8} {'p99 ms':>8} {'sorgu':>6} {'tepe KB':>8} {'bayt':>7}")
+        for scenario in http_scenarios(units, start, now):
+            result = scenario.run(address, engine, args.repeat)
+            results["http"][scenario.name] = result
+            print(f"{scenario.name:<36} {result['p50_ms']:>8} {result['p99_ms']:>8} "
+                  f"{result['queries']:>6} {result['peak_kb']:>8} {result['bytes']:>7}")
+
+        if not args.skip_ws:
+            print()
+            print(f"/ws/production: {args.clients} ekran, {args.duration:.0f} sn")
+            summary = ws_scenario(engine, address, units, models, args)
+            results["ws"]["production"] = summary
+            ws_load.print_summary(summary)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(results, json.load(f))
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,245 @@
+"""/ws/production için yük üreteci: çok sayıda TV ekranını taklit eder.
+
+ws_test.py'deki tek istemcinin çoğaltılmış hâlidir. Her istemci rastgele
+hatlara abone olur, mesajları app.js ile aynı protokole göre işler (seq
+boşluğunda `resync` ister) ve bağlantı / ilk snapshot süresi, veri gecikmesi,
+mesaj ve bayt sayılarını toplar.
+
+`--serve` ile uygulama aynı süreçte sentetik veriyle çalıştırılır ve bir
+besleyici her `--feed-interval` saniyede her hatta yeni kayıt yazar. Veri
+gecikmesi, kaydın yazılmasından onu taşıyan patch'in istemciye ulaşmasına
+kadar geçen süredir; bu yüzden besleme aralığı LIVE_TICK_SECONDS'tan uzun
+tutulmalıdır.
+
+Kullanım (src klasöründen):
+    python -m benchmarks.ws_load --serve --clients 200 --duration 20
+    python -m benchmarks.ws_load --url ws://127.0.0.1:8000/ws/production --clients 50
+"""
+import os
+
+# Uygulama bu süreçte çalışacaksa kısa tick ve rollup'sız başlasın
+os.environ.setdefault("LIVE_TICK_SECONDS", "1")
+os.environ.setdefault("ROLLUP_ENABLED", "0")
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from dataclasses import dataclass, field
+from urllib.parse import urlencode
+
+import websockets
+
+from benchmarks import fixtures
+
+MODELS = [f"MDL-{i:02d}" for i in range(8)]
+
+
+@dataclass
+class LoadStats:
+    connect: list[float] = field(default_factory=list)
+    first_snapshot: list[float] = field(default_factory=list)
+    data_latency: list[float] = field(default_factory=list)
+    messages: int = 0
+    patches: int = 0
+    snapshots: int = 0
+    resyncs: int = 0
+    errors: int = 0
+    failed: int = 0
+    bytes: int = 0
+
+    def summary(self, clients: int, duration: float) -> dict:
+        def ms(values, q):
+            return round(fixtures.percentile(values, q) * 1000, 1)
+
+        return {
+            "clients": clients,
+            "failed": self.failed,
+            "connect_p50_ms": ms(self.connect, 50),
+            "connect_p99_ms": ms(self.connect, 99),
+            "snapshot_p50_ms": ms(self.first_snapshot, 50),
+            "snapshot_p99_ms": ms(self.first_snapshot, 99),
+            "latency_p50_ms": ms(self.data_latency, 50),
+            "latency_p99_ms": ms(self.data_latency, 99),
+            "messages": self.messages,
+            "patches": self.patches,
+            "resyncs": self.resyncs,
+            "errors": self.errors,
+            "kb_per_client_s": round(self.bytes / 1024 / max(clients, 1) / duration, 2),
+        }
+
+
+class Feeder:
+    """Her `interval` saniyede her hatta yeni kayıt yazan canlı hat taklidi."""
+
+    def __init__(self, engine, units: list[str], models: list[str], interval: float, rows_per_unit: int = 1):
+        self.engine = engine
+        self.units = units
+        self.models = models
+        self.interval = interval
+        self.rows_per_unit = rows_per_unit
+        # Yazma işlemlerinin tamamlandığı anlar (perf_counter)
+        self.written: list[float] = []
+
+    async def run(self, stop_at: float):
+        rng = random.Random(1)
+        while time.perf_counter() + self.interval < stop_at:
+            await asyncio.sleep(self.interval)
+            await asyncio.to_thread(
+                fixtures.insert_live_records, self.engine, self.units, self.models, self.rows_per_unit, rng=rng
+            )
+            self.written.append(time.perf_counter())
+
+
+class ProducerTimer:
+    """ProductionBroadcaster'ın üreticisini sarar; tick süresini ölçer."""
+
+    def __init__(self, hub):
+        self.hub = hub
+        self.durations: list[float] = []
+        self._producer = hub.producer
+
+    async def _timed(self):
+        t0 = time.perf_counter()
+        try:
+            return await self._producer()
+        finally:
+            self.durations.append(time.perf_counter() - t0)
+
+    def __enter__(self):
+        self.hub.producer = self._timed
+        return self
+
+    def __exit__(self, *exc):
+        self.hub.producer = self._producer
+
+
+async def tv_client(url: str, units: list[str], stats: LoadStats, stop_at: float, feeder: Feeder | None):
+    target = f"{url}?{urlencode([('unit_name', u) for u in units])}" if units else url
+    t0 = time.perf_counter()
+    try:
+        websocket = await websockets.connect(target, max_size=None, open_timeout=30)
+    except Exception:
+        stats.failed += 1
+        return
+    stats.connect.append(time.perf_counter() - t0)
+    last_seq = None
+    acked = len(feeder.written) if feeder else 0
+    try:
+        while (remaining := stop_at - time.perf_counter()) > 0:
+            try:
+                raw = await asyncio.wait_for(websocket.recv(), remaining)
+            except asyncio.TimeoutError:
+                break
+            arrived = time.perf_counter()
+            stats.messages += 1
+            stats.bytes += len(raw)
+            message = json.loads(raw)
+            kind = message.get("type")
+            if kind == "snapshot":
+                if last_seq is None:
+                    stats.first_snapshot.append(arrived - t0)
+                stats.snapshots += 1
+                last_seq = message["seq"]
+            elif kind == "patch":
+                if last_seq is None or message["prev"] > last_seq:
+                    # Arada mesaj kaçtı; app.js gibi yeni snapshot iste
+                    stats.resyncs += 1
+                    await websocket.send(json.dumps({"type": "resync"}))
+                    continue
+                last_seq = message["seq"]
+                stats.patches += 1
+                if feeder:
+                    written = [t for t in feeder.written[acked:] if t < arrived]
+                    if written:
+                        stats.data_latency.append(arrived - written[0])
+                        acked += len(written)
+            elif kind == "error":
+                stats.errors += 1
+    except websockets.ConnectionClosed:
+        stats.failed += 1
+    finally:
+        await websocket.close()
+
+
+async def run_load(
+    url: str,
+    clients: int,
+    duration: float,
+    units: list[str] | None = None,
+    units_per_client: int = 0,
+    feeder: Feeder | None = None,
+    seed: int = 0,
+) -> dict:
+    """`clients` ekranı aynı anda bağla, `duration` saniye dinle ve özet döndür."""
+    rng = random.Random(seed)
+    stats = LoadStats()
+    stop_at = time.perf_counter() + duration
+    tasks = []
+    for _ in range(clients):
+        subscribed = rng.sample(units, units_per_client) if units and units_per_client else []
+        tasks.append(tv_client(url, subscribed, stats, stop_at, feeder))
+    if feeder:
+        tasks.append(feeder.run(stop_at))
+    await asyncio.gather(*tasks)
+    return stats.summary(clients, duration)
+
+
+def print_summary(summary: dict):
+    for key, value in summary.items():
+        print(f"{key:<22} {value}")
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="ws://127.0.0.1:8000/ws/production")
+    parser.add_argument("--serve", action="store_true", help="Uygulamayı bu süreçte sentetik veriyle çalıştır")
+    parser.add_argument("--clients", type=int, default=100)
+    parser.add_argument("--duration", type=float, default=15)
+    parser.add_argument("--unit", action="append", default=[], help="Abone olunabilecek hatlar (--url ile)")
+    parser.add_argument("--units-per-client", type=int, default=0, help="0: tüm hatlar")
+    parser.add_argument("--units", type=int, default=20, help="--serve: hat sayısı")
+    parser.add_argument("--rows-per-hour", type=int, default=120, help="--serve")
+    parser.add_argument("--feed-interval", type=float, default=2.5, help="--serve")
+    args = parser.parse_args()
+
+    if not args.serve:
+        print_summary(asyncio.run(run_load(
+            args.url, args.clients, args.duration, args.unit, args.units_per_client
+        )))
+        return
+
+    import main
+
+    engine = fixtures.create_local_engine()
+    units = [f"UNIT-{i:02d}" for i in range(args.units)]
+    fixtures.seed_recent(engine, units, MODELS, hours=2, rows_per_hour=args.rows_per_hour)
+    fixtures.install(engine)
+    feeder = Feeder(engine, units, MODELS, args.feed_interval)
+    with fixtures.serve(main.app) as address:
+        summary = serve_load(main, engine, f"ws://{address}/ws/production", units, feeder, args)
+    print_summary(summary)
+
+
+def serve_load(main, engine, url: str, units: list[str], feeder: Feeder, args) -> dict:
+    """Aynı süreçteki uygulamaya yük bindir; sunucu tarafı tick ölçümlerini de ekle."""
+    while not (main.unit_catalog.loaded and main.model_cycle_times.loaded):
+        time.sleep(0.05)
+    with ProducerTimer(main.production_hub) as producer, fixtures.QueryCounter(engine) as counter:
+        summary = asyncio.run(run_load(
+            url, args.clients, args.duration, units, args.units_per_client, feeder
+        ))
+    ticks = len(producer.durations)
+    summary.update({
+        "ticks": ticks,
+        "tick_p50_ms": round(fixtures.percentile(producer.durations, 50) * 1000, 1),
+        "tick_p99_ms": round(fixtures.percentile(producer.durations, 99) * 1000, 1),
+        # Besleyicinin INSERT'leri sayılmaz
+        "queries_per_tick": round((counter.count - len(feeder.written)) / max(ticks, 1), 1),
+    })
+    return summary
+
+
+if __name__ == "__main__":
+    main_cli()
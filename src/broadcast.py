@@ -0,0 +1,168 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable
+
+from fastapi import WebSocket
+
+import metrics
+from applog import get_logger, log_rate_limited
+from encoding import dumps_text
+from tasks import BackgroundTask
+
+log = get_logger("ws")
+
+# Bir istemciye gönderim bu süreyi aşarsa bağlantı düşürülür (saniye)
+SEND_TIMEOUT = 5
+
+# /ws/production mesaj protokolü sürümü
+PROTOCOL_VERSION = 1
+
+Subscription = frozenset[str] | None  # None: tüm hatlar
+
+
+class ProductionBroadcaster(BackgroundTask):
+    """/ws/production için tek üretici görev.
+
+    Veri her tick'te bir kez hesaplanır. Bağlanan istemci önce bir `snapshot`
+    alır, sonrasında yalnızca toplamı değişen (hat, saat) satırlarını taşıyan
+    `patch` mesajları gönderilir. Her mesajın bir `seq` numarası vardır;
+    patch'lerdeki `prev`, aynı aboneliğe gönderilen bir önceki patch'in
+    numarasıdır. `prev` istemcinin son `seq` değerinden büyükse arada mesaj
+    kaçmıştır; istemci `{"type": "resync"}` göndererek yeni snapshot ister.
+    İstemciler bağlanırken `unit_name` parametreleriyle yalnızca belirli
+    hatlara abone olabilir.
+
+    Mesajlar abonelik başına bir kez JSON'a çevrilir (encoding.py) ve aynı
+    metin o aboneliğin tüm soketlerine paralel gönderilir. Yavaş ya da kopmuş istemciler diğerlerini bekletmeden
+    kümeden çıkarılır.
+    """
+
+    def __init__(
+        self,
+        clients: set[WebSocket],
+        producer: Callable[[], Awaitable[dict[str, Any]]],
+        interval: float = 30,
+    ):
+        self.clients = clients
+        self.producer = producer
+        self.interval = interval
+        self.seq = 0
+        # Hat -> saat -> son gönderilen satır
+        self.state: dict[str, dict[int, dict]] | None = None
+        self.subscriptions: dict[WebSocket, Subscription] = {}
+        # Abonelik -> o aboneliğe gönderilen son patch'in seq değeri
+        self._last_sent: dict[Subscription, int] = {}
+        self._wakeup = asyncio.Event()
+
+    async def register(self, websocket: WebSocket, units: list[str] | None = None):
+        """Yeni istemciyi ekle ve mevcut durumu snapshot olarak gönder."""
+        self.clients.add(websocket)
+        self.subscriptions[websocket] = frozenset(units) if units else None
+        if self.state is None:
+            # Henüz veri yoksa üreticiyi bir sonraki tick'i beklemeden uyandır
+            self._wakeup.set()
+        await self.send_snapshot(websocket)
+
+    def wakeup(self):
+        """Bir sonraki tick'i beklemeden üreticiyi çağır (ör. fanout'tan yeni yük geldiğinde)."""
+        self._wakeup.set()
+
+    def unregister(self, websocket: WebSocket):
+        self.clients.discard(websocket)
+        self.subscriptions.pop(websocket, None)
+
+    async def send_snapshot(self, websocket: WebSocket):
+        units = self.subscriptions.get(websocket)
+        data = {
+            unit: list(hours.values())
+            for unit, hours in (self.state or {}).items()
+            if units is None or unit in units
+        }
+        message = {"type": "snapshot", "v": PROTOCOL_VERSION, "seq": self.seq, "data": data}
+        with metrics.JSON_ENCODE_SECONDS.time(message="snapshot"):
+            text = dumps_text(message)
+        await self._send(websocket, text)
+
+    async def _run(self):
+        while True:
+            if self.clients:
+                await self.tick()
+            else:
+                # Bağlı ekran yokken veritabanına gidilmez
+                self.state = None
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    async def tick(self):
+        try:
+            payload = await self.producer()
+        except Exception as e:
+            log_rate_limited(log, logging.ERROR, "tick", "WebSocket veri gönderme hatası: %s", e)
+            await self.broadcast(dumps_text({"type": "error", "error": "Veri çekme hatası"}))
+            return
+
+        state = {
+            unit: {entry["hour"]: entry for entry in entries}
+            for unit, entries in payload["data"].items()
+        }
+        previous = self.state or {}
+        changed: dict[str, list[dict]] = {}
+        for unit, hours in state.items():
+            old_hours = previous.get(unit, {})
+            entries = [entry for hour, entry in hours.items() if old_hours.get(hour) != entry]
+            if entries:
+                changed[unit] = entries
+        self.state = state
+        if not changed:
+            # Veri değişmediyse istemcilere bir şey gönderilmez
+            return
+
+        self.seq += 1
+        messages: dict[Subscription, str] = {}
+        for units in set(self.subscriptions.values()):
+            data = {
+                unit: entries for unit, entries in changed.items()
+                if units is None or unit in units
+            }
+            if data:
+                with metrics.JSON_ENCODE_SECONDS.time(message="patch"):
+                    messages[units] = dumps_text({
+                        "type": "patch",
+                        "v": PROTOCOL_VERSION,
+                        "seq": self.seq,
+                        "prev": self._last_sent.get(units, 0),
+                        "data": data,
+                    })
+                self._last_sent[units] = self.seq
+
+        sends = [
+            self._send(ws, messages[units])
+            for ws, units in list(self.subscriptions.items())
+            if units in messages
+        ]
+        if sends:
+            with metrics.WS_BROADCAST_SECONDS.time():
+                await asyncio.gather(*sends)
+
+    async def broadcast(self, message: str):
+        clients = list(self.clients)
+        if clients:
+            await asyncio.gather(*(self._send(ws, message) for ws in clients))
+
+    async def _send(self, websocket: WebSocket, message: str):
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(websocket.send_text(message), SEND_TIMEOUT)
+            metrics.WS_SEND_SECONDS.observe(time.perf_counter() - start)
+        except Exception as e:
+            log.warning("WebSocket istemcisi düşürüldü %s: %r", websocket.client, e)
+            metrics.WS_DROPPED_CLIENTS.inc()
+            self.unregister(websocket)
+            try:
+                await asyncio.wait_for(websocket.close(), SEND_TIMEOUT)
+            except Exception:
+                pass
@@ -0,0 +1,155 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from sqlalchemy.orm import Session
+
+import crud
+
+# ✅ Kapanmış saatlerin önbellek ayarları
+HOUR_CACHE_TTL = int(os.getenv("HOUR_CACHE_TTL", str(12 * 3600)))
+HOUR_CACHE_MAX_ENTRIES = int(os.getenv("HOUR_CACHE_MAX_ENTRIES", "20000"))
+HOUR_CACHE_MAX_MB = float(os.getenv("HOUR_CACHE_MAX_MB", "64"))
+
+# Saat kapandıktan sonra geç yazılan kayıtlar için beklenen süre
+CLOSE_GRACE = timedelta(minutes=2)
+
+BucketKey = tuple[str, str, int]  # (hat, "YYYY-MM-DD", saat)
+
+
+def _estimate_size(bucket: dict) -> int:
+    # Kaba tahmin: özet sözlüğü + model başına bir demet (bayt)
+    return 400 + 150 * len(bucket["models"])
+
+
+def hour_starts(start_dt: datetime, end_dt: datetime) -> list[datetime]:
+    """[start_dt, end_dt) aralığına değen saat başlarını sırayla döndür."""
+    hour = start_dt.replace(minute=0, second=0, microsecond=0)
+    hours = []
+    while hour < end_dt:
+        hours.append(hour)
+        hour += timedelta(hours=1)
+    return hours
+
+
+class HourBucketCache:
+    """Kapanmış (hat, gün, saat) özetleri için TTL + LRU önbellek.
+
+    Bitmiş bir saatin verisi bir daha değişmez; bu saatler bir kez sorgulanır,
+    sonraki isteklerde yalnızca açık saat (ve yeni kapanan saat) veritabanından
+    okunur. Kayıt sayısı ve tahmini bellek kullanımı sınırlandırılmıştır.
+    """
+
+    def __init__(
+        self,
+        ttl: float = HOUR_CACHE_TTL,
+        max_entries: int = HOUR_CACHE_MAX_ENTRIES,
+        max_bytes: int = int(HOUR_CACHE_MAX_MB * 1024 * 1024),
+        fetch=crud.fetch_hour_buckets,
+    ):
+        self.ttl = ttl
+        # Eksik saatleri okuyan fonksiyon (crud.fetch_hour_buckets ile aynı imza)
+        self.fetch = fetch
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[BucketKey, tuple[float, int, dict]] = OrderedDict()
+        # run_in_db iş parçacıkları aynı önbelleği paylaşır
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key: BucketKey) -> dict | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, _, bucket = entry
+            if expires_at < time.monotonic():
+                self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return bucket
+
+    def put(self, key: BucketKey, bucket: dict):
+        size = _estimate_size(bucket)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl, size, bucket)
+            self.size_bytes += size
+            while self._entries and (
+                len(self._entries) > self.max_entries or self.size_bytes > self.max_bytes
+            ):
+                self._remove(next(iter(self._entries)))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size_bytes = 0
+
+    def _remove(self, key: BucketKey):
+        _, size, _ = self._entries.pop(key)
+        self.size_bytes -= size
+
+    def load(
+        self,
+        db: Session,
+        unit_names: list[str],
+        start_dt: datetime,
+        end_dt: datetime,
+        now: datetime | None = None,
+    ) -> dict[str, list[tuple[datetime, dict]]]:
+        """Aralıktaki saat özetlerini hat bazında (saat başı, özet) listesi olarak döndür.
+
+        Baştan itibaren önbellekte olan kapanmış saatler kullanılır; ilk eksik
+        saatten aralık sonuna kadarki kısım tek sorguyla okunur. Aralığın
+        başındaki/sonundaki yarım saatler önbelleğe alınmaz.
+        """
+        now = now or datetime.now()
+
+        def cacheable(hour: datetime) -> bool:
+            hour_end = hour + timedelta(hours=1)
+            return hour >= start_dt and hour_end <= end_dt and hour_end + CLOSE_GRACE <= now
+
+        hours = hour_starts(start_dt, end_dt)
+        found: dict[str, dict[datetime, dict]] = {unit: {} for unit in unit_names}
+        query_from = None
+        for hour in hours:
+            if cacheable(hour):
+                day = hour.strftime("%Y-%m-%d")
+                cached = [self.get((unit, day, hour.hour)) for unit in unit_names]
+                if all(bucket is not None for bucket in cached):
+                    for unit, bucket in zip(unit_names, cached):
+                        found[unit][hour] = bucket
+                    continue
+            query_from = hour
+            break
+
+        if query_from is not None:
+            fetched = self.fetch(db, unit_names, max(start_dt, query_from), end_dt)
+            for hour in hours:
+                if hour < query_from:
+                    continue
+                day = hour.strftime("%Y-%m-%d")
+                for unit in unit_names:
+                    key = (unit, day, hour.hour)
+                    bucket = fetched.get(key)
+                    if cacheable(hour):
+                        # Üretim olmayan saatler de saklanır, tekrar sorgulanmasın
+                        self.put(key, bucket or crud.empty_bucket(day, hour.hour))
+                    if bucket is not None:
+                        found[unit][hour] = bucket
+
+        return {
+            unit: [(hour, bucket) for hour, bucket in sorted(buckets.items()) if bucket["total"]]
+            for unit, buckets in found.items()
+        }
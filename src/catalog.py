@@ -0,0 +1,117 @@
+"""Hat (ve hat başına model) kataloğu; /unit-names ve unit_name doğrulaması.
+
+İlk yükleme son CATALOG_LOOKBACK_DAYS günün ham kayıtlarından bir kez
+yapılır; sonrasında katalog arka planda rollup tablosundan ve canlı yayının
+gördüğü kayıtlardan genişletilir. İstekler veritabanına gitmeden bellekten
+cevaplanır.
+"""
+import hashlib
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Iterable
+
+from sqlalchemy.orm import Session
+
+import crud
+from applog import get_logger
+from tasks import PeriodicRefresh
+
+log = get_logger("data")
+
+# ✅ Katalog ayarları
+CATALOG_REFRESH_SECONDS = float(os.getenv("CATALOG_REFRESH_SECONDS", "600"))
+CATALOG_LOOKBACK_DAYS = int(os.getenv("CATALOG_LOOKBACK_DAYS", "90"))
+
+
+class UnitCatalog(PeriodicRefresh):
+    """Bilinen hatlar ve her hatta görülen modeller.
+
+    Katalog yalnızca genişler (süreç ömrü boyunca hat silinmez); içerik her
+    değiştiğinde `version` değişir ve ETag olarak kullanılır.
+    """
+
+    def __init__(
+        self,
+        interval: float = CATALOG_REFRESH_SECONDS,
+        lookback_days: int = CATALOG_LOOKBACK_DAYS,
+        rollup=None,
+    ):
+        super().__init__(interval, log, "Hat kataloğu yenilenemedi: %s")
+        self.lookback = timedelta(days=lookback_days)
+        # Periyodik yenilemeler için (rollup.HourlyRollup); hazır değilse ham kayıtlar okunur
+        self.rollup = rollup
+        self.models: dict[str, frozenset] = {}
+        self.version = ""
+        self.loaded = False
+        self._lock = threading.Lock()
+
+    def refresh(self, db: Session, now: datetime | None = None) -> int:
+        """Kataloğu veritabanından genişlet, eklenen (hat, model) sayısını döndür."""
+        now = now or datetime.now()
+        from_rollup = self.loaded and self.rollup is not None and self.rollup.complete_until is not None
+        since = now - (timedelta(days=1) if from_rollup else self.lookback)
+        rows = crud.fetch_unit_models(db, since, from_rollup=from_rollup)
+        added = self.merge((row.UnitName, row.Model) for row in rows)
+        if not self.loaded:
+            self.loaded = True
+            log.info("Hat kataloğu yüklendi: %d hat", len(self.models))
+        return added
+
+    def merge(self, pairs: Iterable[tuple[str, str | None]]) -> int:
+        """(hat, model) çiftlerini ekle; yeni bir şey geldiyse sürümü güncelle."""
+        added = 0
+        with self._lock:
+            models = None
+            for unit, model in pairs:
+                if unit is None:
+                    continue
+                known = (models or self.models).get(unit)
+                if known is not None and (model is None or model in known):
+                    continue
+                if models is None:
+                    models = dict(self.models)
+                models[unit] = (known or frozenset()) | ({model} if model is not None else set())
+                added += 1
+            if models is not None:
+                # İstekler kilitsiz okur; sözlük her seferinde bütün olarak değiştirilir
+                self.models = models
+                self.version = self._digest(models)
+        return added
+
+    def state(self) -> dict:
+        """Çok işçili dağıtımda takipçilere gönderilen katalog (fanout.py)."""
+        return {"loaded": self.loaded, "version": self.version, "models": self.models_by_unit()}
+
+    def load_state(self, state: dict):
+        """Liderin kataloğunu ekle (katalog yalnızca genişler)."""
+        if state["version"] != self.version:
+            self.merge(
+                (unit, model)
+                for unit, models in state["models"].items()
+                for model in (models or [None])
+            )
+        if state["loaded"] and not self.loaded:
+            self.loaded = True
+            log.info("Hat kataloğu liderden alındı: %d hat", len(self.models))
+
+    @staticmethod
+    def _digest(models: dict[str, frozenset]) -> str:
+        content = "\n".join(
+            f"{unit}\t{','.join(sorted(models[unit]))}" for unit in sorted(models)
+        )
+        return hashlib.sha1(content.encode("utf-8")).hexdigest()[:16]
+
+    def unit_names(self) -> list[str]:
+        return sorted(self.models)
+
+    def models_by_unit(self) -> dict[str, list[str]]:
+        models = self.models
+        return {unit: sorted(models[unit]) for unit in sorted(models)}
+
+    def unknown(self, unit_names: Iterable[str]) -> list[str]:
+        """Katalogda olmayan hatlar (katalog yüklenmediyse ya da boşsa boş liste)."""
+        models = self.models
+        if not self.loaded or not models:
+            return []
+        return [unit for unit in unit_names if unit not in models]
@@ -1,21 +1,63 @@
+from datetime import date, datetime, timedelta
+from itertools import chain
+from typing import Iterable
+
 from sqlalchemy.orm import Session
-from sqlalchemy.sql import text
+from sqlalchemy.sql import bindparam, text
 
+import metrics
+from models import ProductionHourlyRollup
 
-def fetch_production_data(db: Session):
-    query = text("""
-        SELECT
-            UnitName,  
-            DATEPART(HOUR, KayitTarihi) AS Hour,
-            COUNT(*) AS TotalCount,
-            SUM(CASE WHEN TestSonucu = 1 THEN 1 ELSE 0 END) AS SuccessCount,
-            SUM(CASE WHEN TestSonucu = 0 THEN 1 ELSE 0 END) AS FailCount
-        FROM dbo.ProductRecordLog
-        GROUP BY UnitName, DATEPART(HOUR, KayitTarihi)
-        ORDER BY UnitName, Hour
-    """)
+ROLLUP_TABLE = ProductionHourlyRollup.__tablename__
+
+
+def fetch_production_data(
+    db: Session,
+    start_date: datetime | None = None,
+    end_date: datetime | None = None,
+    from_rollup: bool = False,
+):
+    """Hat ve saat bazlı toplam/başarılı/hatalı sayıları [start_date, end_date) aralığında döndür.
 
-    result = db.execute(query).fetchall()
+    Tarih verilmezse bugünün verisi döner (eskiden tüm tablo taranıyordu).
+    `from_rollup` ile ham kayıtlar yerine saatlik rollup tablosu okunur.
+    """
+    if start_date is None:
+        start_date = datetime.combine(date.today(), datetime.min.time())
+    if end_date is None:
+        end_date = start_date + timedelta(days=1)
+
+    if from_rollup:
+        query = text(f"""
+            SELECT
+                UnitName,
+                Hour,
+                SUM(ModelProduction) AS TotalCount,
+                SUM(SuccessCount) AS SuccessCount,
+                SUM(FailCount) AS FailCount
+            FROM {ROLLUP_TABLE}
+            WHERE HourStart >= :start_date AND HourStart < :end_date
+            GROUP BY UnitName, Hour
+            ORDER BY UnitName, Hour
+        """)
+    else:
+        hour = hour_expression(db)
+        query = text(f"""
+            SELECT
+                UnitName,
+                {hour} AS Hour,
+                COUNT(*) AS TotalCount,
+                SUM(CASE WHEN TestSonucu = 1 THEN 1 ELSE 0 END) AS SuccessCount,
+                SUM(CASE WHEN TestSonucu = 0 THEN 1 ELSE 0 END) AS FailCount
+            FROM dbo.ProductRecordLog
+            WHERE KayitTarihi >= :start_date AND KayitTarihi < :end_date
+            GROUP BY UnitName, {hour}
+            ORDER BY UnitName, Hour
+        """)
+
+    result = metrics.fetchall(
+        db, "production_data", query, {"start_date": start_date, "end_date": end_date}
+    )
 
     # ✅ Verileri dict formatında döndür
     return [
@@ -32,4 +74,296 @@ def fetch_production_data(db: Session):
     ]
 
 
+def hour_expression(db: Session, column: str = "KayitTarihi") -> str:
+    """DATEPART(HOUR, ...) ifadesini bağlantının lehçesine göre döndür."""
+    # Yerel SQLite kopyası (benchmark) DATEPART bilmiyor
+    if db.get_bind().dialect.name == "sqlite":
+        return f"CAST(strftime('%H', {column}) AS INTEGER)"
+    return f"DATEPART(HOUR, {column})"
+
+
+def date_expression(db: Session, column: str = "KayitTarihi") -> str:
+    """CAST(... AS DATE) ifadesini bağlantının lehçesine göre döndür."""
+    if db.get_bind().dialect.name == "sqlite":
+        return f"date({column})"
+    return f"CAST({column} AS DATE)"
+
+
+def hour_start_expression(db: Session, column: str = "KayitTarihi") -> str:
+    """Kaydın ait olduğu saat başını (dakika/saniye sıfırlanmış) döndüren ifade."""
+    if db.get_bind().dialect.name == "sqlite":
+        return f"strftime('%Y-%m-%d %H:00:00', {column})"
+    return f"DATEADD(HOUR, DATEDIFF(HOUR, 0, {column}), 0)"
+
+
+# Model bazlı satır: (hat, "YYYY-MM-DD", saat, model, adet, başarılı, hatalı);
+# oee.columns_from_rows bu satırları doğrudan sütunlara çevirir
+ModelRow = tuple[str, str, int, str | None, int, int, int]
+
+
+def empty_bucket(day: str, hour: int) -> dict:
+    return {"date": day, "hour": hour, "total": 0, "success": 0, "fail": 0, "models": []}
+
+
+def _add_model_row(buckets: dict, row) -> None:
+    key = (row.UnitName, str(row.Day)[:10], row.Hour)
+    bucket = buckets.get(key)
+    if bucket is None:
+        bucket = buckets[key] = empty_bucket(key[1], key[2])
+    success, fail = row.SuccessCount or 0, row.FailCount or 0
+    bucket["total"] += row.ModelProduction
+    bucket["success"] += success
+    bucket["fail"] += fail
+    bucket["models"].append((*key, row.Model, row.ModelProduction, success, fail))
+
+
+def bucket_rows(buckets: Iterable[dict]) -> list[ModelRow]:
+    """Saat özetlerinin model satırlarını tek listede birleştir."""
+    return list(chain.from_iterable(bucket["models"] for bucket in buckets))
+
+
+def fetch_hour_buckets(
+    db: Session,
+    unit_names: list[str],
+    start: datetime,
+    end: datetime,
+) -> dict[tuple[str, str, int], dict]:
+    """Seçilen tüm hatlar için (hat, gün, saat) bazlı model/kalite verisini tek sorguda getir.
+
+    Aralık yarı açıktır: [start, end). Saatlik toplamlar model gruplarının
+    toplamıdır, bu yüzden ayrı bir özet sorgusuna gerek yoktur. Anahtardaki
+    gün "YYYY-MM-DD" biçimindedir; özetin `models` listesi ModelRow
+    satırlarıdır. Hedef çevrim süreleri burada hesaplanmaz (cycle_times.py).
+    """
+    hour = hour_expression(db)
+    day = date_expression(db)
+    # Filtre yalnızca KayitTarihi üzerinde ve datetime parametrelerle: indeks seek'i
+    # (UnitName, KayitTarihi) ile yapılır, saat ifadeleri sadece gruplamada kullanılır
+    query = text(f"""
+        SELECT
+            UnitName,
+            {day} AS Day,
+            {hour} AS Hour,
+            Model,
+            COUNT(*) AS ModelProduction,
+            SUM(CASE WHEN TestSonucu = 1 THEN 1 ELSE 0 END) AS SuccessCount,
+            SUM(CASE WHEN TestSonucu = 0 THEN 1 ELSE 0 END) AS FailCount
+        FROM dbo.ProductRecordLog
+        WHERE UnitName IN :unit_names
+            AND KayitTarihi >= :start AND KayitTarihi < :end
+        GROUP BY UnitName, {day}, {hour}, Model
+        ORDER BY UnitName, Day, Hour, Model
+    """).bindparams(bindparam("unit_names", expanding=True))
+
+    result = metrics.fetchall(
+        db,
+        "hour_buckets",
+        query,
+        {"start": start, "end": end, "unit_names": list(unit_names)},
+    )
+
+    buckets: dict[tuple[str, str, int], dict] = {}
+    for row in result:
+        _add_model_row(buckets, row)
+    return buckets
+
+
+def fetch_production_since(db: Session, since: datetime, settle: datetime) -> list:
+    """`since` ve sonrasında yazılan kayıtları (hat, gün, saat, model) bazında özetle.
+
+    Canlı yayın bu sorguyu her tick'te çağırır. `settle` öncesindeki kayıtlar
+    Settled=1 ile ayrı gruplanır ve kesinleşmiş sayılır; sonrası (son birkaç
+    dakika) her tick yeniden okunur. Böylece geç commit edilen ya da saati
+    geride olan istasyonun kayıtları kaçmaz. Maliyet pencere boyutuna değil,
+    bu aralıktaki üretime bağlıdır.
+    """
+    hour = hour_expression(db)
+    day = date_expression(db)
+    # Settled alt sorguda bir kez hesaplanır: parametreli CASE'i SELECT ve
+    # GROUP BY'da tekrarlamak pyodbc'de iki ayrı parametre olur ve SQL Server
+    # bunları aynı ifade saymaz (hata 8120)
+    query = text(f"""
+        SELECT
+            UnitName,
+            {day} AS Day,
+            {hour} AS Hour,
+            Model,
+            COUNT(*) AS ModelProduction,
+            SUM(CASE WHEN TestSonucu = 1 THEN 1 ELSE 0 END) AS SuccessCount,
+            SUM(CASE WHEN TestSonucu = 0 THEN 1 ELSE 0 END) AS FailCount,
+            MAX(KayitTarihi) AS LastRecord,
+            Settled
+        FROM (
+            SELECT
+                UnitName, Model, KayitTarihi, TestSonucu,
+                CASE WHEN KayitTarihi < :settle THEN 1 ELSE 0 END AS Settled
+            FROM dbo.ProductRecordLog
+            WHERE KayitTarihi >= :since
+        ) AS records
+        GROUP BY UnitName, {day}, {hour}, Model, Settled
+    """)
+    return metrics.fetchall(db, "production_since", query, {"since": since, "settle": settle})
+
+
+def refresh_rollup(db: Session, start: datetime, end: datetime) -> int:
+    """[start, end) saatlerinin rollup satırlarını ham kayıtlardan yeniden yaz.
+
+    Silme + INSERT ... SELECT tek işlemde yapılır; aynı aralık tekrar
+    çalıştırılabilir (idempotent). `start` ve `end` saat başı olmalıdır.
+    Yazılan satır sayısını döndürür.
+    """
+    hour = hour_expression(db)
+    day = date_expression(db)
+    hour_start = hour_start_expression(db)
+    params = {"start": start, "end": end, "now": datetime.now()}
+    with metrics.DB_QUERY_SECONDS.time(query="rollup_refresh"):
+        db.execute(
+            text(f"DELETE FROM {ROLLUP_TABLE} WHERE HourStart >= :start AND HourStart < :end"),
+            params,
+        )
+        result = db.execute(text(f"""
+            INSERT INTO {ROLLUP_TABLE} (
+                UnitName, Day, Hour, Model, HourStart, ModelProduction,
+                CycleSum, CycleCount, SuccessCount, FailCount, UpdatedAt
+            )
+            SELECT
+                UnitName,
+                {day},
+                {hour},
+                COALESCE(Model, ''),
+                {hour_start},
+                COUNT(*),
+                SUM(ModelSuresiSN),
+                COUNT(ModelSuresiSN),
+                SUM(CASE WHEN TestSonucu = 1 THEN 1 ELSE 0 END),
+                SUM(CASE WHEN TestSonucu = 0 THEN 1 ELSE 0 END),
+                :now
+            FROM dbo.ProductRecordLog
+            WHERE KayitTarihi >= :start AND KayitTarihi < :end
+            GROUP BY UnitName, {day}, {hour}, {hour_start}, COALESCE(Model, '')
+        """), params)
+        db.commit()
+    return result.rowcount
+
+
+def fetch_rollup_bounds(db: Session) -> tuple:
+    """Rollup tablosundaki ilk ve son saat başı (tablo boşsa (None, None))."""
+    row = metrics.fetchall(
+        db, "rollup_bounds",
+        text(f"SELECT MIN(HourStart) AS First, MAX(HourStart) AS Last FROM {ROLLUP_TABLE}"),
+    )[0]
+    first, last = row.First, row.Last
+    if isinstance(first, str):  # SQLite tarihleri metin döndürür
+        first, last = datetime.fromisoformat(first), datetime.fromisoformat(last)
+    return first, last
+
+
+def fetch_rollup(
+    db: Session, start: datetime, end: datetime, unit_names: list[str] | None = None
+) -> list:
+    """[start, end) saatlerinin rollup satırları (fetch_production_since ile aynı sütunlar)."""
+    unit_filter = "AND UnitName IN :unit_names" if unit_names is not None else ""
+    query = text(f"""
+        SELECT
+            UnitName, Day, Hour, NULLIF(Model, '') AS Model, ModelProduction,
+            SuccessCount, FailCount, NULL AS LastRecord, 1 AS Settled
+        FROM {ROLLUP_TABLE}
+        WHERE HourStart >= :start AND HourStart < :end {unit_filter}
+        ORDER BY UnitName, HourStart, Model
+    """)
+    params = {"start": start, "end": end}
+    if unit_names is not None:
+        query = query.bindparams(bindparam("unit_names", expanding=True))
+        params["unit_names"] = list(unit_names)
+    return metrics.fetchall(db, "rollup", query, params)
+
+
+def fetch_rollup_buckets(
+    db: Session, unit_names: list[str], start: datetime, end: datetime
+) -> dict[tuple[str, str, int], dict]:
+    """`fetch_hour_buckets` ile aynı yapıyı rollup tablosundan üret ([start, end) saatleri)."""
+    buckets: dict[tuple[str, str, int], dict] = {}
+    for row in fetch_rollup(db, start, end, unit_names):
+        _add_model_row(buckets, row)
+    return buckets
+
+
+def fetch_unit_models(db: Session, since: datetime, from_rollup: bool = False) -> list:
+    """`since` sonrasında üretim yapan (hat, model) çiftleri."""
+    if from_rollup:
+        query = text(f"""
+            SELECT DISTINCT UnitName, NULLIF(Model, '') AS Model
+            FROM {ROLLUP_TABLE}
+            WHERE HourStart >= :since
+        """)
+    else:
+        query = text("""
+            SELECT DISTINCT UnitName, Model
+            FROM dbo.ProductRecordLog
+            WHERE KayitTarihi >= :since
+        """)
+    return metrics.fetchall(db, "unit_models", query, {"since": since})
+
+
+def fetch_model_targets(db: Session, table: str, model_column: str, target_column: str) -> list:
+    """Model tanım tablosundaki hedef çevrim süreleri (Model, Target)."""
+    query = text(f"SELECT {model_column} AS Model, {target_column} AS Target FROM {table}")
+    return metrics.fetchall(db, "model_targets", query)
+
+
+def fetch_model_cycle_averages(db: Session, since: datetime, from_rollup: bool = False) -> list:
+    """`since` sonrasında modellerin ortalama çevrim süresi (Model, Target); hedef yedeği."""
+    if from_rollup:
+        query = text(f"""
+            SELECT NULLIF(Model, '') AS Model, SUM(CycleSum) * 1.0 / SUM(CycleCount) AS Target
+            FROM {ROLLUP_TABLE}
+            WHERE HourStart >= :since
+            GROUP BY Model
+            HAVING SUM(CycleCount) > 0
+        """)
+    else:
+        query = text("""
+            SELECT Model, AVG(CAST(ModelSuresiSN AS FLOAT)) AS Target
+            FROM dbo.ProductRecordLog
+            WHERE KayitTarihi >= :since
+            GROUP BY Model
+        """)
+    return metrics.fetchall(db, "model_cycle_averages", query, {"since": since})
+
+
+EXPORT_COLUMNS = ["UnitName", "KayitTarihi", "Model", "ModelSuresiSN", "TestSonucu"]
+
+
+def iter_records(
+    db: Session,
+    unit_names: list[str],
+    start: datetime,
+    end: datetime,
+    models: list[str] | None = None,
+    batch_size: int = 5000,
+):
+    """[start, end) aralığındaki ham kayıtları `batch_size`lık parçalar halinde üret.
+
+    Sonuç sunucu tarafında akıtılır (yield_per); bellekte en fazla bir parça tutulur.
+    """
+    model_filter = "AND Model IN :models" if models else ""
+    query = text(f"""
+        SELECT {", ".join(EXPORT_COLUMNS)}
+        FROM dbo.ProductRecordLog
+        WHERE UnitName IN :unit_names
+            AND KayitTarihi >= :start AND KayitTarihi < :end
+            {model_filter}
+        ORDER BY UnitName, KayitTarihi
+    """).bindparams(bindparam("unit_names", expanding=True))
+    params = {"unit_names": list(unit_names), "start": start, "end": end}
+    if models:
+        query = query.bindparams(bindparam("models", expanding=True))
+        params["models"] = list(models)
 
+    result = db.execute(
+        query, params, execution_options={"stream_results": True, "yield_per": batch_size}
+    )
+    try:
+        yield from result.partitions(batch_size)
+    finally:
+        result.close()
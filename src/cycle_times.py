@@ -0,0 +1,120 @@
+"""Model bazlı hedef çevrim süreleri (saniye); OEE performans hesabının girdisi.
+
+Hedefler model tanım tablosundan (varsayılan dbo.ProductRecordLogModels)
+okunur; tablo ve sütun adları ortam değişkenleriyle ayarlanır. Tabloda
+olmayan ya da hedefi tanımsız modeller için son CYCLE_TIMES_FALLBACK_DAYS
+günün ortalama ModelSuresiSN değeri kullanılır (rollup hazırsa rollup
+tablosundan). Katalog arka planda yenilenir; saatlik sorgular artık
+AVG(ModelSuresiSN) hesaplamaz, yalnızca adetleri gruplar.
+
+Hedefi bulunamayan model performansa katılmaz ve bir kez uyarı olarak
+loglanır (her tick'te değil); sayısı /metrics'te görülür.
+"""
+import hashlib
+import os
+import threading
+from datetime import datetime, timedelta
+
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+import crud
+from applog import get_logger
+from tasks import PeriodicRefresh
+
+log = get_logger("perf")
+
+# ✅ Hedef çevrim süresi ayarları
+CYCLE_TIMES_REFRESH_SECONDS = float(os.getenv("CYCLE_TIMES_REFRESH_SECONDS", "900"))
+CYCLE_TIMES_FALLBACK_DAYS = int(os.getenv("CYCLE_TIMES_FALLBACK_DAYS", "30"))
+MODELS_TABLE = os.getenv("MODELS_TABLE", "dbo.ProductRecordLogModels")
+MODELS_NAME_COLUMN = os.getenv("MODELS_NAME_COLUMN", "Model")
+MODELS_TARGET_COLUMN = os.getenv("MODELS_TARGET_COLUMN", "ModelSuresiSN")
+
+
+class ModelCycleTimes(PeriodicRefresh):
+    """Model -> hedef çevrim süresi eşlemesi.
+
+    Eşleme her yenilemede bütün olarak değiştirilir (istekler kilitsiz okur);
+    içerik değiştiğinde `version` değişir ve HTTP ETag'lerine eklenir.
+    """
+
+    def __init__(
+        self,
+        interval: float = CYCLE_TIMES_REFRESH_SECONDS,
+        fallback_days: int = CYCLE_TIMES_FALLBACK_DAYS,
+        rollup=None,
+    ):
+        super().__init__(interval, log, "Hedef çevrim süreleri yenilenemedi: %s")
+        self.fallback = timedelta(days=fallback_days)
+        # Yedek ortalamalar için (rollup.HourlyRollup); hazır değilse ham kayıtlar okunur
+        self.rollup = rollup
+        self.targets: dict[str, float] = {}
+        self.version = ""
+        self.loaded = False
+        # Hedefi olmadığı için uyarısı verilmiş modeller
+        self.missing: set[str] = set()
+        self._table_error = False
+        self._lock = threading.Lock()
+
+    def refresh(self, db: Session, now: datetime | None = None) -> int:
+        """Hedefleri yeniden yükle, hedefi bilinen model sayısını döndür."""
+        now = now or datetime.now()
+        from_rollup = self.rollup is not None and self.rollup.complete_until is not None
+        rows = crud.fetch_model_cycle_averages(db, now - self.fallback, from_rollup=from_rollup)
+        targets = {row.Model: float(row.Target) for row in rows if row.Model is not None and row.Target}
+
+        try:
+            defined = crud.fetch_model_targets(db, MODELS_TABLE, MODELS_NAME_COLUMN, MODELS_TARGET_COLUMN)
+        except SQLAlchemyError as e:
+            db.rollback()
+            if not self._table_error:
+                log.warning("%s okunamadı, yalnızca ortalama çevrim süreleri kullanılıyor: %s", MODELS_TABLE, e)
+                self._table_error = True
+            defined = []
+        # Tanım tablosundaki hedef ortalamanın önüne geçer
+        for row in defined:
+            if row.Model is not None and row.Target and float(row.Target) > 0:
+                targets[row.Model] = float(row.Target)
+
+        self._set_targets(targets)
+        if not self.loaded:
+            self.loaded = True
+            log.info("Hedef çevrim süreleri yüklendi: %d model (%d tanımlı)", len(targets), len(defined))
+        return len(targets)
+
+    def _set_targets(self, targets: dict[str, float]):
+        digest = hashlib.sha1(repr(sorted(targets.items())).encode("utf-8")).hexdigest()[:16]
+        with self._lock:
+            self.targets = targets
+            self.version = digest
+            found = sorted(self.missing & targets.keys())
+            self.missing -= targets.keys()
+        if found:
+            log.info("Hedef çevrim süresi bulunan modeller: %s", ", ".join(found))
+
+    def state(self) -> dict:
+        """Çok işçili dağıtımda takipçilere gönderilen hedefler (fanout.py)."""
+        return {"loaded": self.loaded, "targets": self.targets}
+
+    def load_state(self, state: dict):
+        """Liderin hedeflerini uygula."""
+        if state["targets"] != self.targets:
+            self._set_targets(state["targets"])
+        if state["loaded"] and not self.loaded:
+            self.loaded = True
+            log.info("Hedef çevrim süreleri liderden alındı: %d model", len(self.targets))
+
+    def target(self, model: str | None) -> float:
+        """Modelin hedef çevrim süresi; yoksa 0 (model performansa katılmaz)."""
+        target = self.targets.get(model)
+        if target:
+            return target
+        # Katalog yüklenmeden önceki boşluk uyarıya sebep olmasın
+        if self.loaded and model not in self.missing:
+            with self._lock:
+                if model in self.missing:
+                    return 0.0
+                self.missing.add(model)
+            log.warning("Model %s için hedef çevrim süresi yok, performansa katılmıyor", model)
+        return 0.0
@@ -0,0 +1,43 @@
+"""HTTP ve WebSocket cevapları için JSON kodlama katmanı.
+
+orjson kuruluysa kullanılır (stdlib json'dan birkaç kat hızlı), değilse
+aynı çıktıyı üreten json yedeğine düşülür. Sayısal alanlar oee.py'de zaten
+2 haneye yuvarlanmış geldiği için burada ek dönüşüm yapılmaz.
+
+Sıkıştırma: HTTP cevapları GZipMiddleware ile (main.py), /ws/production
+mesajları ise sunucu ile tarayıcının anlaştığı permessage-deflate ile
+sıkıştırılır (uvicorn'da varsayılan açık, bkz. README).
+"""
+import json
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+import metrics
+
+try:
+    import orjson
+except ImportError:  # orjson isteğe bağlı
+    orjson = None
+
+BACKEND = "orjson" if orjson is not None else "json"
+
+
+def dumps(obj: Any) -> bytes:
+    """Nesneyi kompakt UTF-8 JSON'a çevir."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def dumps_text(obj: Any) -> str:
+    """WebSocket metin mesajları için `dumps` (tüm alıcılar aynı metni paylaşır)."""
+    return dumps(obj).decode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """`dumps` ile kodlayan JSONResponse (FastAPI'nin jsonable_encoder adımı atlanır)."""
+
+    def render(self, content: Any) -> bytes:
+        with metrics.JSON_ENCODE_SECONDS.time(message="http"):
+            return dumps(content)
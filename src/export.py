@@ -0,0 +1,109 @@
+"""Ham ProductRecordLog kayıtlarının CSV / NDJSON olarak akıtılması (/export).
+
+Kayıtlar sunucu tarafı imleçle EXPORT_BATCH_ROWS'luk parçalar halinde okunur
+ve her parça kodlanıp hemen gönderilir. StreamingResponse bir sonraki parçayı
+ancak öncekisi istemciye yazıldıktan sonra ister; yavaş istemci veritabanı
+okumasını da yavaşlatır (backpressure), bellek kullanımı sabit kalır.
+"""
+import csv
+import io
+import os
+import threading
+from datetime import datetime
+from typing import Generator
+
+from fastapi.responses import StreamingResponse
+
+import crud
+import database
+import metrics
+from applog import get_logger
+from encoding import dumps
+
+log = get_logger("data")
+
+# ✅ Dışa aktarma ayarları
+EXPORT_BATCH_ROWS = int(os.getenv("EXPORT_BATCH_ROWS", "5000"))
+EXPORT_MAX_DAYS = int(os.getenv("EXPORT_MAX_DAYS", "62"))
+# Her dışa aktarma akış boyunca bir bağlantı tutar; havuzu tüketmesin
+EXPORT_MAX_CONCURRENT = int(os.getenv("EXPORT_MAX_CONCURRENT", "2"))
+
+FORMATS = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+export_slots = threading.BoundedSemaphore(EXPORT_MAX_CONCURRENT)
+
+
+def _value(value):
+    # SQLite tarihleri metin, MSSQL datetime döndürür; çıktı her ikisinde de ISO biçimi
+    if isinstance(value, datetime):
+        return value.isoformat(sep=" ")
+    return value
+
+
+def _encode_csv(rows, header: bool) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    if header:
+        writer.writerow(crud.EXPORT_COLUMNS)
+    writer.writerows([_value(v) for v in row] for row in rows)
+    return buffer.getvalue().encode("utf-8")
+
+
+def _encode_ndjson(rows) -> bytes:
+    columns = crud.EXPORT_COLUMNS
+    return b"".join(
+        dumps({name: _value(v) for name, v in zip(columns, row)}) + b"\n" for row in rows
+    )
+
+
+def stream_records(
+    unit_names: list[str],
+    start: datetime,
+    end: datetime,
+    models: list[str] | None,
+    fmt: str,
+) -> Generator[bytes, None, None]:
+    """Kayıtları seçilen biçimde parça parça üret.
+
+    Oturum üretecin içinde açılır ve akış bitince (ya da istemci koptuğunda)
+    kapanır. Çağıranın aldığı `export_slots` yerini `ExportResponse` bırakır.
+    """
+    db = database.ReadSessionLocal()
+    total = 0
+    try:
+        if fmt == "csv":
+            yield _encode_csv([], header=True)
+        for rows in crud.iter_records(db, unit_names, start, end, models, EXPORT_BATCH_ROWS):
+            total += len(rows)
+            yield _encode_csv(rows, header=False) if fmt == "csv" else _encode_ndjson(rows)
+    finally:
+        db.close()
+        metrics.DB_ROWS.observe(total, query="export")
+        log.info("Dışa aktarma bitti: %s %s - %s, %d kayıt", unit_names, start, end, total)
+
+
+class ExportResponse(StreamingResponse):
+    """`export_slots` yerini akış nasıl biterse bitsin bırakan StreamingResponse.
+
+    Yer üretecin finally bloğunda bırakılsaydı, istemci ilk parçadan önce
+    koptuğunda ya da başlık gönderilemediğinde üreteç hiç başlamaz ve yer
+    süreç yeniden başlayana kadar kaybolurdu.
+    """
+
+    def __init__(self, records: Generator[bytes, None, None], **kwargs):
+        super().__init__(records, **kwargs)
+        self.records = records
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            try:
+                # Yarıda kalan akışın oturumu çöp toplayıcıyı beklemeden kapansın
+                self.records.close()
+            except ValueError:  # parça o an iş parçacığında okunuyor; kendi finally'si kapatır
+                pass
+            export_slots.release()
@@ -0,0 +1,230 @@
+"""Çok işçili dağıtımda (uvicorn --workers N) canlı yayın için tek veri üreticisi.
+
+FANOUT_ENABLED=1 iken işçilerden FANOUT_HOST:FANOUT_PORT'u ilk bağlayan
+lider olur. Canlı yük (main.build_live_payload) yalnızca liderde hesaplanır
+ve bağlı işçilere yerel TCP bağlantısı üzerinden satır başına bir JSON
+olarak yayınlanır. Diğer işçiler takipçidir: yükü alır ve kendi
+ProductionBroadcaster'larıyla kendi soketlerine gönderir. Böylece
+WebSocket dağıtımı çekirdeklere yayılırken DB yoklaması işçi sayısından
+bağımsız kalır.
+
+Lider, kendi ekranı yoksa da takipçilerden biri "talep" bildirdiği sürece
+üretir; hiçbir işçide ekran yokken veritabanına gidilmez. Lider düşerse
+takipçiler portu bağlamayı dener ve ilk bağlayan yeni lider olur.
+
+Rol değişince `on_role` çağrılır; main.py rollup, hat kataloğu ve hedef
+çevrim süresi görevlerini yalnızca liderde çalıştırır. Liderin `state`i
+(rollup sınırları, katalog, hedefler, hat veri sürümleri) değişen
+anahtarlarıyla her tick'te, yeni takipçiye ise bütün olarak gönderilir;
+takipçiler bunu `on_state` ile uygular.
+Unix soketi yerine TCP kullanılır; Windows'ta da çalışır.
+"""
+import asyncio
+import json
+import logging
+import os
+import random
+import time
+from typing import Any, Awaitable, Callable
+
+from applog import get_logger, log_rate_limited
+from encoding import dumps
+from tasks import BackgroundTask
+
+log = get_logger("ws")
+
+# ✅ Çok işçili yayın ayarları
+FANOUT_ENABLED = os.getenv("FANOUT_ENABLED", "0") == "1"
+FANOUT_HOST = os.getenv("FANOUT_HOST", "127.0.0.1")
+FANOUT_PORT = int(os.getenv("FANOUT_PORT", "8799"))
+
+# Lider değişiminde yeniden deneme aralığı (saniye, rastgele yayılır)
+RETRY_SECONDS = 0.5
+# Takipçiye yazma bu süreyi aşarsa bağlantısı kapatılır (saniye)
+SEND_TIMEOUT = 5
+# Tek satırlık yük için okuma sınırı (bayt); asyncio varsayılanı 64 KB
+LINE_LIMIT = 16 * 1024 * 1024
+
+
+class SharedProducer(BackgroundTask):
+    """ProductionBroadcaster'a verilen üreticiyi işçiler arasında paylaştırır.
+
+    `produce` her işçide hub'ın üreticisidir ve son yayınlanan yükü döndürür;
+    gerçek üretici (`producer`) yalnızca liderde çağrılır. Yeni yük geldiğinde
+    `on_payload` çağrılır (hub'ı bir sonraki tick'i beklemeden uyandırmak için).
+    `state` liderde paylaşılacak durumu döndürür, `on_state` takipçide uygular.
+    """
+
+    def __init__(
+        self,
+        producer: Callable[[], Awaitable[dict[str, Any]]],
+        interval: float,
+        has_clients: Callable[[], bool],
+        on_payload: Callable[[], None] | None = None,
+        state: Callable[[], dict] | None = None,
+        on_state: Callable[[dict], None] | None = None,
+        on_role: Callable[[str], Awaitable[None]] | None = None,
+        host: str = FANOUT_HOST,
+        port: int = FANOUT_PORT,
+    ):
+        self.producer = producer
+        self.interval = interval
+        self.has_clients = has_clients
+        self.on_payload = on_payload
+        self.state = state
+        self.on_state = on_state
+        self.on_role = on_role
+        self.host = host
+        self.port = port
+        self.role: str | None = None  # "leader" / "follower"
+        self.payload: dict[str, Any] | None = None
+        self.error: str | None = None
+        self.received_at = 0.0
+        # Lider: takipçilere en son gönderilen durum
+        self._state: dict | None = None
+        self._fresh = asyncio.Event()
+        self._demand = asyncio.Event()
+        # Lider: takipçi -> ekranı var mı
+        self._followers: dict[asyncio.StreamWriter, bool] = {}
+        # Takipçi: lidere açık bağlantı
+        self._leader: asyncio.StreamWriter | None = None
+
+    async def produce(self) -> dict[str, Any]:
+        """Hub için son yük; eskiyse ya da hiç yoksa lider tazesini üretene kadar bekler."""
+        if self.payload is None or time.monotonic() - self.received_at > 2 * self.interval:
+            self._fresh.clear()
+            self._request()
+            await asyncio.wait_for(self._fresh.wait(), max(10, 2 * self.interval))
+        if self.error is not None:
+            raise RuntimeError(self.error)
+        return self.payload
+
+    def _request(self):
+        if self.role == "leader":
+            self._demand.set()
+        else:
+            self._send_demand(True)
+
+    def _accept(self, payload: dict | None, error: str | None):
+        self.payload, self.error = payload, error
+        self.received_at = time.monotonic()
+        self._fresh.set()
+        if self.on_payload is not None:
+            self.on_payload()
+
+    async def _run(self):
+        while True:
+            try:
+                server = await asyncio.start_server(self._serve_follower, self.host, self.port, limit=LINE_LIMIT)
+            except OSError:
+                # Port başka bir işçide: takipçi ol
+                try:
+                    await self._follow()
+                except (OSError, asyncio.IncompleteReadError, ValueError) as e:
+                    log.info("Canlı yayın liderine bağlantı koptu: %r", e)
+                finally:
+                    self._leader = None
+                await asyncio.sleep(RETRY_SECONDS * (1 + random.random()))
+                continue
+            log.info("Canlı yayın lideri bu işçi (pid %d)", os.getpid())
+            await self._set_role("leader")
+            async with server:
+                await self._lead()
+
+    async def _set_role(self, role: str):
+        self.role = role
+        if self.on_role is not None:
+            await self.on_role(role)
+
+    # --- lider ---
+
+    async def _lead(self):
+        while True:
+            if self.has_clients() or any(self._followers.values()):
+                try:
+                    payload, error = await self.producer(), None
+                except Exception as e:
+                    log_rate_limited(log, logging.ERROR, "produce", "Canlı yük üretilemedi: %s", e)
+                    payload, error = None, "Veri çekme hatası"
+                self._accept(payload, error)
+                await self._publish(dumps({"payload": payload, "error": error}) + b"\n")
+            await self._publish_state()
+            try:
+                await asyncio.wait_for(self._demand.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._demand.clear()
+
+    async def _publish(self, line: bytes):
+        async def send(writer: asyncio.StreamWriter):
+            try:
+                writer.write(line)
+                await asyncio.wait_for(writer.drain(), SEND_TIMEOUT)
+            except Exception as e:
+                log.warning("Canlı yayın takipçisi düşürüldü: %r", e)
+                self._followers.pop(writer, None)
+                writer.close()
+
+        if self._followers:
+            await asyncio.gather(*(send(writer) for writer in list(self._followers)))
+
+    async def _publish_state(self):
+        """Durumun yalnızca değişen üst anahtarlarını gönder (canlı sürümler her tick değişir)."""
+        if self.state is None:
+            return
+        state = self.state()
+        changed = {key: value for key, value in state.items() if (self._state or {}).get(key) != value}
+        self._state = state
+        if changed:
+            await self._publish(dumps({"state": changed}) + b"\n")
+
+    async def _serve_follower(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._followers[writer] = False
+        if self._state is not None:
+            # Yeni takipçi bir sonraki değişikliği beklemeden son durumu alır
+            writer.write(dumps({"state": self._state}) + b"\n")
+        log.info("Canlı yayın takipçisi bağlandı (%d)", len(self._followers))
+        try:
+            while line := await reader.readline():
+                wants = bool(json.loads(line).get("demand"))
+                if wants and not self._followers.get(writer):
+                    # Takipçide ilk ekran bağlandı: beklemeden üret
+                    self._demand.set()
+                if writer in self._followers:
+                    self._followers[writer] = wants
+        except (OSError, ValueError):
+            pass
+        finally:
+            self._followers.pop(writer, None)
+            writer.close()
+
+    # --- takipçi ---
+
+    def _send_demand(self, wants: bool):
+        if self._leader is not None:
+            self._leader.write(dumps({"demand": wants}) + b"\n")
+
+    async def _follow(self):
+        reader, self._leader = await asyncio.open_connection(self.host, self.port, limit=LINE_LIMIT)
+        log.info("Canlı yayın takipçisi (pid %d), lider %s:%d", os.getpid(), self.host, self.port)
+        await self._set_role("follower")
+
+        async def heartbeat():
+            # Talep durumu her aralıkta bildirilir; lider ekranı olmayan işçiler için üretmez
+            while True:
+                self._send_demand(self.has_clients())
+                await asyncio.sleep(self.interval)
+
+        task = asyncio.create_task(heartbeat())
+        try:
+            while line := await reader.readline():
+                message = json.loads(line)
+                if "state" in message:
+                    if self.on_state is not None:
+                        self.on_state(message["state"])
+                    continue
+                self._accept(message["payload"], message["error"])
+            raise ConnectionResetError("lider bağlantıyı kapattı")
+        finally:
+            task.cancel()
+            self._leader.close()
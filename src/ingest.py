@@ -0,0 +1,167 @@
+import os
+import threading
+from datetime import datetime, timedelta
+
+from sqlalchemy.orm import Session
+
+import crud
+from applog import get_logger
+
+log = get_logger("ingest")
+
+CounterKey = tuple[str, str, int, str]  # (hat, "YYYY-MM-DD", saat, model)
+
+# Son bu kadar saniyenin kayıtları her tick yeniden okunur (geç commit, istasyon saat farkı)
+LIVE_OVERLAP_SECONDS = float(os.getenv("LIVE_OVERLAP_SECONDS", "120"))
+
+
+def _add(counters: dict[CounterKey, dict], key: CounterKey, row):
+    counter = counters.get(key)
+    if counter is None:
+        counter = counters[key] = {"count": 0, "success": 0, "fail": 0}
+    counter["count"] += row.ModelProduction
+    counter["success"] += row.SuccessCount or 0
+    counter["fail"] += row.FailCount or 0
+
+
+class LiveProductionCounters:
+    """Canlı yayın için (hat, gün, saat, model) bazlı artımlı sayaçlar.
+
+    Sayaçlar iki parçadır: `settled_until` öncesi kesinleşmiş kayıtlar
+    (bir kez okunur, eklenir) ve son `overlap` süresinin kayıtları (her
+    tick yeniden okunup tümüyle değiştirilir). Geç commit edilen, saati
+    geride olan istasyondan gelen ya da aynı zaman damgalı kayıtlar bu
+    pencerede yakalanır. Pencerenin dışına düşen saatler atılır; yayın
+    verisi doğrudan bu sayaçlardan üretilir.
+    """
+
+    def __init__(self, window_hours: int = 1, rollup=None, overlap: float = LIVE_OVERLAP_SECONDS):
+        self.window_hours = window_hours
+        # İlk yüklemede pencerenin kapanmış saatleri bu rollup'tan okunur (rollup.HourlyRollup)
+        self.rollup = rollup
+        self.overlap = timedelta(seconds=overlap)
+        # Bu andan önceki kayıtlar `settled` sayaçlarında, sonrası `recent`'ta
+        self.settled_until: datetime | None = None
+        # Hat -> o hatta görülen son KayitTarihi (HTTP ETag'leri için veri sürümü)
+        self.unit_last: dict[str, datetime] = {}
+        self.refreshed_at: datetime | None = None
+        # Takipçi işçide liderden gelen hat -> (son kayıt, adet)
+        self._shared_versions: dict[str, tuple[datetime | None, int]] | None = None
+        self.settled: dict[CounterKey, dict] = {}
+        self.recent: dict[CounterKey, dict] = {}
+        self._lock = threading.Lock()
+
+    def window_start(self, now: datetime) -> datetime:
+        # Şimdiki saat + önceki `window_hours` saat
+        return now.replace(minute=0, second=0, microsecond=0) - timedelta(hours=self.window_hours)
+
+    def refresh(self, db: Session, now: datetime | None = None) -> int:
+        """Sayaçları güncelle, toplam adetteki değişimi döndür."""
+        now = now or datetime.now()
+        window_start = self.window_start(now)
+        with self._lock:
+            rows = []
+            since = self.settled_until
+            if since is None:
+                since = window_start
+                covered = self.rollup.covered(window_start, now) if self.rollup else None
+                if covered is not None and covered[0] == window_start:
+                    rows = crud.fetch_rollup(db, *covered)
+                    since = covered[1]
+            settle = max(since, now - self.overlap)
+            rows += crud.fetch_production_since(db, since, settle)
+
+            before = sum(counter["count"] for counter in self.recent.values())
+            recent: dict[CounterKey, dict] = {}
+            added = 0
+            for row in rows:
+                key = (row.UnitName, str(row.Day)[:10], row.Hour, row.Model)
+                if row.Settled:
+                    _add(self.settled, key, row)
+                    added += row.ModelProduction
+                else:
+                    _add(recent, key, row)
+                last = row.LastRecord
+                if last is None:  # rollup satırı
+                    continue
+                if isinstance(last, str):  # SQLite tarihleri metin döndürür
+                    last = datetime.fromisoformat(last)
+                unit_last = self.unit_last.get(row.UnitName)
+                if unit_last is None or last > unit_last:
+                    self.unit_last[row.UnitName] = last
+            self.recent = recent
+            self.settled_until = settle
+            added += sum(counter["count"] for counter in recent.values()) - before
+
+            self._evict(window_start)
+            self.refreshed_at = now
+        if added:
+            log.debug("Canlı sayaçlar %+d kayıt değişti, kesinleşen=%s", added, settle)
+        return added
+
+    def unit_versions(self, unit_names: list[str], now: datetime, max_age: float) -> tuple | None:
+        """Hatların (son kayıt zamanı, penceredeki adet) çiftleri; sayaçlar `max_age` saniyeden eskiyse None.
+
+        Adet de eklenir: geç gelen eski tarihli kayıt son kayıt zamanını değiştirmez.
+        Takipçi işçide (fanout) sürümler liderden gelir (`load_state`).
+        """
+        with self._lock:
+            if self.refreshed_at is None or (now - self.refreshed_at).total_seconds() > max_age:
+                return None
+            versions = self._versions()
+        return tuple(versions.get(unit, (None, 0)) for unit in unit_names)
+
+    def _versions(self) -> dict[str, tuple[datetime | None, int]]:
+        if self._shared_versions is not None:
+            return self._shared_versions
+        counts: dict[str, int] = {}
+        for counters in (self.settled, self.recent):
+            for key, counter in counters.items():
+                counts[key[0]] = counts.get(key[0], 0) + counter["count"]
+        return {unit: (self.unit_last.get(unit), counts.get(unit, 0)) for unit in counts.keys() | self.unit_last.keys()}
+
+    def state(self) -> dict:
+        """Hat sürümleri; çok işçili dağıtımda takipçilere gönderilir (fanout.py)."""
+        with self._lock:
+            if self.refreshed_at is None:
+                return {"refreshed_at": None, "units": {}}
+            return {
+                "refreshed_at": self.refreshed_at.isoformat(),
+                "units": {
+                    unit: [last.isoformat() if last else None, count]
+                    for unit, (last, count) in self._versions().items()
+                },
+            }
+
+    def load_state(self, state: dict):
+        """Liderin hat sürümlerini uygula; takipçi sayaçları kendisi güncellemez."""
+        if state["refreshed_at"] is None:
+            return
+        versions = {
+            unit: (datetime.fromisoformat(last) if last else None, count)
+            for unit, (last, count) in state["units"].items()
+        }
+        with self._lock:
+            self._shared_versions = versions
+            self.refreshed_at = datetime.fromisoformat(state["refreshed_at"])
+
+    def _evict(self, window_start: datetime):
+        oldest = (window_start.strftime("%Y-%m-%d"), window_start.hour)
+        for counters in (self.settled, self.recent):
+            for key in [key for key in counters if (key[1], key[2]) < oldest]:
+                del counters[key]
+
+    def model_rows(self) -> list[crud.ModelRow]:
+        """Sayaçları (hat, gün, saat, model) sırasıyla model satırlarına çevir (oee.columns_from_rows girdisi)."""
+        with self._lock:
+            counters = {key: dict(counter) for key, counter in self.settled.items()}
+            for key, counter in self.recent.items():
+                if key in counters:
+                    for field in ("count", "success", "fail"):
+                        counters[key][field] += counter[field]
+                else:
+                    counters[key] = counter
+        return [
+            (*key, counter["count"], counter["success"], counter["fail"])
+            for key, counter in sorted(counters.items(), key=lambda item: (*item[0][:3], str(item[0][3])))
+        ]
@@ -1,22 +1,56 @@
 import asyncio
+import hashlib
 import json
-import logging
 import os
+from contextlib import asynccontextmanager
 
-from fastapi import Depends, FastAPI, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, Query, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import PlainTextResponse, Response
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from sqlalchemy import text
 from sqlalchemy.orm import Session
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 
 
 import crud
+import database
+import export
+import metrics
+import oee
+import shifts
+from applog import get_logger, setup_logging
 import schemas
-from database import get_db
+from broadcast import ProductionBroadcaster
+from cache import CLOSE_GRACE, HourBucketCache
+from catalog import UnitCatalog
+from cycle_times import ModelCycleTimes
+from encoding import FastJSONResponse, dumps, dumps_text
+from fanout import FANOUT_ENABLED, SharedProducer
+from ingest import LiveProductionCounters
+from rollup import ROLLUP_ENABLED, HourlyRollup
+from database import db_executor, run_in_db, run_in_read_db
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # /ws/production yayını uygulama açılışında tek görev olarak başlar
+    log.info("DB havuzu: %s, %d iş parçacığı", database.pool_stats(), database.DB_MAX_WORKERS)
+    production_hub.start()
+    if FANOUT_ENABLED:
+        # Rollup, katalog ve hedef görevleri yalnızca lider seçilen işçide başlar
+        shared_producer.start()
+    else:
+        start_background_jobs()
+    yield
+    await stop_background_jobs()
+    await shared_producer.stop()
+    await production_hub.stop()
+    db_executor.shutdown(wait=False)
+
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan, default_response_class=FastJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -24,8 +58,13 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],  # results.js If-None-Match için okur
 )
 
+# Bu boyuttan (bayt) büyük HTTP cevapları gzip ile sıkıştırılır
+GZIP_MIN_SIZE = int(os.getenv("GZIP_MIN_SIZE", "1000"))
+app.add_middleware(GZipMiddleware, minimum_size=GZIP_MIN_SIZE, compresslevel=5)
+
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 templates = Jinja2Templates(directory=os.path.join(BASE_DIR, "templates"))
 app.mount("/static", StaticFiles(directory="static"), name="static")
@@ -36,298 +75,445 @@ def read_root(request: Request):
     return templates.TemplateResponse("index.html", {"request": request})
 
 
+# /results sayfası gömülü veri için en fazla bu kadar (saniye) bekler
+RESULTS_SNAPSHOT_TIMEOUT = float(os.getenv("RESULTS_SNAPSHOT_TIMEOUT", "1.5"))
+
+
 @app.get("/results")
-def results_page(request: Request):
-    return templates.TemplateResponse("results.html", {"request": request})
-
-
-def calculate_elapsed_seconds(hour: int, base_date: datetime) -> int:
-    """Verilen saat için o ana kadar geçen süreyi saniye cinsinden döndür."""
-    now = datetime.now()
-    start_of_hour = datetime.combine(base_date.date(), datetime.min.time()) + timedelta(hours=hour)
-    if now >= start_of_hour + timedelta(hours=1):
-        return 3600
-    elif now < start_of_hour:
-        return 0
-    else:
-        return int((now - start_of_hour).total_seconds())
+async def results_page(
+    request: Request,
+    start_date: str | None = Query(None, description="Başlangıç tarihi"),
+    end_date: str | None = Query(None, description="Bitiş tarihi"),
+    unit_name: list[str] = Query([], description="Üretim hattı adı"),
+):
+    """Sonuç ekranı; seçilen hatların ilk verisi sayfaya gömülür.
+
+    results.js ilk boyamayı bu veriyle yapar ve /hourly-production/ isteği
+    atmadan WebSocket'e abone olur. Veri önbellek/rollup üzerinden tek
+    sorguda hazırlanır; hazırlanamazsa ya da `RESULTS_SNAPSHOT_TIMEOUT` içinde
+    bitmezse sayfa boş gelir ve JS kendisi getirir.
+    """
+    snapshot = None
+    if unit_name and start_date and end_date and not unit_catalog.unknown(unit_name):
+        try:
+            snapshot = await asyncio.wait_for(
+                hourly_snapshot(unit_name, start_date, end_date), RESULTS_SNAPSHOT_TIMEOUT
+            )
+        except asyncio.TimeoutError:
+            # Sorgu havuzda bitmeye devam eder; sonucu hour_cache'i ısıtır
+            log.warning("Sonuç ekranı verisi %.1f sn içinde hazırlanamadı, sayfa verisiz gönderiliyor",
+                        RESULTS_SNAPSHOT_TIMEOUT)
+        except Exception as e:
+            log.error("Sonuç ekranı verisi hazırlanamadı: %s", e)
+    return templates.TemplateResponse("results.html", {"request": request, "snapshot": embed_json(snapshot)})
+
+
+setup_logging()
+log = get_logger("app")
+data_log = get_logger("data")
+ws_log = get_logger("ws")
+
+# Saatlik rollup tablosu; kesinleşmiş saatler ham kayıtlar yerine buradan okunur
+hourly_rollup = HourlyRollup()
+
+# (hat, gün, saat) bazlı kapanmış saat özetleri
+hour_cache = HourBucketCache(fetch=hourly_rollup.fetch_hour_buckets)
+
+# Bilinen hatlar/modeller; /unit-names ve unit_name doğrulaması DB'ye gitmeden buradan
+unit_catalog = UnitCatalog(rollup=hourly_rollup)
+UNIT_NAMES_MAX_AGE = int(os.getenv("UNIT_NAMES_MAX_AGE", "60"))
+
+# Model hedef çevrim süreleri; OEE performansı sorgularda AVG yerine buradan hesaplanır
+model_cycle_times = ModelCycleTimes(rollup=hourly_rollup)
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    return header.strip() == "*" or etag in (tag.strip() for tag in header.split(","))
+
+
+@app.get("/unit-names")
+async def get_unit_names(
+    request: Request,
+    include_models: bool = Query(False, description="Hat başına görülen modeller de dönsün"),
+):
+    if not unit_catalog.loaded:
+        # Açılışta katalog henüz yüklenmedi: boş liste önbelleğe alınmasın
+        return FastJSONResponse(
+            {"error": "Hat kataloğu yükleniyor, lütfen tekrar deneyin."},
+            status_code=503,
+            headers={"Cache-Control": "no-store", "Retry-After": "5"},
+        )
+    etag = f'W/"{unit_catalog.version}{"-m" if include_models else ""}"'
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={UNIT_NAMES_MAX_AGE}"}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+
+    body = {"unit_names": unit_catalog.unit_names()}
+    if include_models:
+        body["models"] = unit_catalog.models_by_unit()
+    return FastJSONResponse(body, headers=headers)
+
+
+def compute_hourly_production(
+    db: Session, unit_name: list[str], start_date: str, end_date: str
+) -> dict[str, list[dict]]:
+    """Seçilen hatların saatlik kalite/performans/OEE verisini hesapla."""
+    start_dt = datetime.fromisoformat(start_date)
+    end_dt = datetime.fromisoformat(end_date)
+
+    # Kapanmış saatler önbellekten gelir, yalnızca açık saat(ler) tek sorguda okunur
+    buckets = hour_cache.load(db, unit_name, start_dt, end_dt)
+
+    rows = crud.bucket_rows(bucket for unit_buckets in buckets.values() for _, bucket in unit_buckets)
+    columns = oee.columns_from_rows(rows, model_cycle_times.target)
+    entries = oee.hourly_entries(oee.hourly_metrics(columns))
+
+    # Verisi olmayan hatlar da boş liste olarak döner
+    result_data = {unit: entries.get(unit, []) for unit in unit_name}
+    data_log.debug("Final data: %s", result_data)
+    return result_data
+
+
+# Açık aralıklarda ETag bu süre (saniye) boyunca aynı kalır; açık saatin
+# performansı kayıt gelmese de geçen süreyle değiştiği için sürüme eklenir
+ETAG_TIME_QUANTUM = int(os.getenv("ETAG_TIME_QUANTUM", "60"))
+
+
+def data_version(unit_name: list[str], end_dt: datetime, now: datetime) -> str | None:
+    """Aralığın veri sürümü; DB'ye gitmeden bilinemiyorsa None."""
+    if end_dt + CLOSE_GRACE <= now:
+        # Kapanmış aralık bir daha değişmez
+        return "closed"
+    # Canlı sayaçlar yalnızca yayın çalışırken (herhangi bir işçide ekran bağlıyken) günceldir;
+    # takipçi işçide sürümler liderden gelir
+    versions = live_counters.unit_versions(unit_name, now, max_age=2 * LIVE_TICK_SECONDS + 5)
+    if versions is None:
+        return None
+    return f"{versions}|{int(now.timestamp()) // ETAG_TIME_QUANTUM}"
+
+
+def make_etag(*parts) -> str:
+    return 'W/"' + hashlib.sha1(repr(parts).encode("utf-8")).hexdigest()[:16] + '"'
+
+
+def hourly_etag(unit_name: list[str], start_date: str, end_date: str) -> str | None:
+    """/hourly-production/ ETag'i; veri sürümü bilinmiyorsa None (içerikten üretilir)."""
+    version = data_version(unit_name, datetime.fromisoformat(end_date), datetime.now())
+    if not version:
+        return None
+    # Hedefler değişince kapanmış aralıkların da yeniden hesaplanması gerekir
+    return make_etag(start_date, end_date, unit_name, version, model_cycle_times.version)
+
+
+async def hourly_snapshot(unit_name: list[str], start_date: str, end_date: str) -> dict:
+    """/results sayfasına gömülen ilk veri; `etag` aynı isteğin /hourly-production/ ETag'idir.
+
+    results.js sonraki yoklamada bu ETag'i gönderir, veri değişmediyse 304 alır.
+    """
+    start_date = start_date.replace("T", " ")
+    end_date = end_date.replace("T", " ")
+    etag = hourly_etag(unit_name, start_date, end_date)
+    body = {"data": await run_in_read_db(compute_hourly_production, unit_name, start_date, end_date)}
+    return {**body, "etag": etag or make_etag(dumps(body))}
+
+
+def embed_json(obj) -> str:
+    """Nesneyi <script type="application/json"> içine güvenle gömülecek metne çevir."""
+    # "</script>" ve HTML yorumları JSON içinde bile etiketi kapatabilir
+    return dumps_text(obj).replace("<", "\\u003c").replace(">", "\\u003e").replace("&", "\\u0026")
+
 
 @app.get("/hourly-production/")
 async def get_hourly_production(
+    request: Request,
     start_date: str = Query(..., description="Başlangıç tarihi"),
     end_date: str = Query(..., description="Bitiş tarihi"),
     unit_name: list[str] = Query(..., description="Üretim hattı adı"),
-    db: Session = Depends(get_db),
 ):
+    """Seçilen tüm hatların saatlik verisi tek cevapta.
+
+    Cevapta veri sürümünden üretilen bir ETag vardır; istemci If-None-Match
+    gönderirse ve veri değişmediyse veritabanına gidilmeden 304 döner.
+    """
+    # Bilinmeyen hat adları SQL'e gitmeden reddedilir
+    unknown = unit_catalog.unknown(unit_name)
+    if unknown:
+        return FastJSONResponse({"error": f"Bilinmeyen hat: {', '.join(unknown)}"}, status_code=400)
+
     try:
         start_date = start_date.replace("T", " ")
         end_date = end_date.replace("T", " ")
-        start_dt = datetime.strptime(start_date, "%Y-%m-%d %H:%M:%S")
-
-        result_data = {}
-
-        for unit in unit_name:
-            query = text("""
-                SELECT
-                    DATEPART(HOUR, KayitTarihi) AS Hour,
-                    Model,
-                    COUNT(*) AS ModelProduction,
-                    AVG(ModelSuresiSN) AS Target
-                FROM dbo.ProductRecordLog
-                WHERE KayitTarihi BETWEEN :start_date AND :end_date AND UnitName = :unit_name
-                GROUP BY DATEPART(HOUR, KayitTarihi), Model
-                ORDER BY Hour, Model
-            """)
-            result = db.execute(
-                query, {"start_date": start_date, "end_date": end_date, "unit_name": unit}
-            ).fetchall()
-
-            hour_model_data: dict[int, list[dict[str, any]]] = {}
-            for row in result:
-                if row is None:
-                    continue
-                hour = row[0]
-                model = row[1]
-                model_prod = row[2]
-                target = row[3] or 0
-                if hour not in hour_model_data:
-                    hour_model_data[hour] = []
-                hour_model_data[hour].append({
-                    "model": model,
-                    "model_production": model_prod,
-                    "target": target
-                })
-
-            unit_data = []
-            for hour, models in hour_model_data.items():
-                summary_query = text("""
-                    SELECT
-                        COUNT(*) AS TotalCount,
-                        SUM(CASE WHEN TestSonucu = 1 THEN 1 ELSE 0 END) AS SuccessCount,
-                        SUM(CASE WHEN TestSonucu = 0 THEN 1 ELSE 0 END) AS FailCount
-                    FROM dbo.ProductRecordLog
-                    WHERE KayitTarihi BETWEEN :start_date AND :end_date AND UnitName = :unit_name AND DATEPART(HOUR, KayitTarihi) = :hour
-                """)
-                summary_result = db.execute(
-                    summary_query,
-                    {
-                        "start_date": start_date,
-                        "end_date": end_date,
-                        "unit_name": unit,
-                        "hour": hour
-                    }
-                ).fetchone()
-                if summary_result is None:
-                    total, success, fail = 0, 0, 0
-                else:
-                    total, success, fail = summary_result
-                quality = (success / total) if total > 0 else 0
-
-                elapsed_seconds = calculate_elapsed_seconds(hour, start_dt)
-                total_performance = 0
-                for m in models:
-                    model_prod = m["model_production"]
-                    target = m["target"]
-                    if target and target > 0:
-                        # Calculate ideal cycle time as 3600/Target (seconds per unit)
-                        ideal_cycle_time = 3600 / target
-                        # Calculate performance contribution as (model_production * ideal_cycle_time) / elapsed_seconds
-                        if elapsed_seconds > 0:
-                            performance_contribution = (model_prod * ideal_cycle_time) / elapsed_seconds
-                            total_performance += performance_contribution
-                            logging.info(f"Unit {unit}, Hour {hour}, Model {m['model']}: Prod={model_prod}, Target={target}, Ideal Cycle Time={ideal_cycle_time:.2f}, Contribution={performance_contribution:.2f}")
-                        else:
-                            logging.warning(f"Unit {unit}, Hour {hour}, Model {m['model']}: No elapsed time, skipping performance.")
-                    else:
-                        logging.warning(f"Unit {unit}, Hour {hour}, Model {m['model']}: No target, skipping performance.")
-
-                # Overall performance is the sum of all model contributions
-                performance = total_performance
-                # OEE is calculated as Quality × Performance
-                oee = quality * performance
-
-                entry_data = {
-                    "hour": hour,
-                    "total": total,
-                    "success": success,
-                    "fail": fail,
-                    "quality": round(quality, 2),
-                    "performance": round(performance, 2),
-                    "oee": round(oee, 2)
-                }
-                logging.info(f"[DATA DEBUG] Adding entry for unit {unit}, hour {hour}: {entry_data}")
-                unit_data.append(entry_data)
-
-            result_data[unit] = unit_data
-            logging.info(f"[DATA DEBUG] Final data for unit {unit}: {unit_data}")
-
-        final_response = {"data": result_data}
-        logging.info(f"[DATA DEBUG] Sending WebSocket response: {final_response}")
-        return final_response
+
+        etag = hourly_etag(unit_name, start_date, end_date)
+        headers = {"Cache-Control": "no-cache"}
+        if etag is not None:
+            headers["ETag"] = etag
+            if etag_matches(request, etag):
+                return Response(status_code=304, headers=headers)
+
+        # Sorgu DB havuzunda çalışır, event loop diğer istekleri sunmaya devam eder
+        # Raporlama sorgusu: DATABASE_READ_URL tanımlıysa salt okunur kopyadan okunur
+        result_data = await run_in_read_db(compute_hourly_production, unit_name, start_date, end_date)
+
+        response = FastJSONResponse({"data": result_data}, headers=headers)
+        if etag is None:
+            # Sürüm bilinmiyorsa içerikten ETag; en azından gövde tekrar gönderilmez
+            etag = make_etag(response.body)
+            response.headers["ETag"] = etag
+            if etag_matches(request, etag):
+                return Response(status_code=304, headers={**headers, "ETag": etag})
+        return response
 
     except Exception as e:
-        logging.error(f"Hata oluştu: {e}")
+        log.error("Hata oluştu: %s", e)
         return {"error": "Bir hata oluştu, lütfen logları kontrol edin."}
 
 
 
 
 
+# /shift-summary için izin verilen en uzun aralık (gün)
+SHIFT_SUMMARY_MAX_DAYS = int(os.getenv("SHIFT_SUMMARY_MAX_DAYS", "92"))
+if ROLLUP_ENABLED and hourly_rollup.backfill_days < SHIFT_SUMMARY_MAX_DAYS:
+    log.warning(
+        "ROLLUP_BACKFILL_DAYS (%d) < SHIFT_SUMMARY_MAX_DAYS (%d): eski vardiya özetleri ham kayıtlardan okunur",
+        hourly_rollup.backfill_days, SHIFT_SUMMARY_MAX_DAYS,
+    )
+
+
+@app.get("/shift-summary")
+async def get_shift_summary(
+    start_date: str = Query(..., description="İlk üretim günü (YYYY-MM-DD)"),
+    end_date: str = Query(..., description="Son üretim günü (YYYY-MM-DD, dahil)"),
+    unit_name: list[str] = Query(..., description="Üretim hattı adı"),
+    scheme: str = Query("3x8", description="Vardiya düzeni: 3x8 ya da 2x12"),
+):
+    """Vardiya, gün ve hafta bazında OEE/kalite/performans özetleri (tek çağrıda).
+
+    `from_rollup` false ise aralığın bir kısmı rollup'ın kapsamı dışındadır
+    (ROLLUP_BACKFILL_DAYS'ten eski ya da rollup henüz hazır değil) ve ham
+    kayıtlardan okunur; uzun aralıklarda cevap yavaşlayabilir.
+    """
+    try:
+        start_day = date.fromisoformat(start_date[:10])
+        end_day = date.fromisoformat(end_date[:10])
+    except ValueError:
+        return FastJSONResponse({"error": "Tarih biçimi YYYY-MM-DD olmalı"}, status_code=400)
+    if scheme not in shifts.SHIFT_SCHEMES:
+        return FastJSONResponse({"error": f"Bilinmeyen vardiya düzeni: {scheme}"}, status_code=400)
+    if end_day < start_day or (end_day - start_day).days >= SHIFT_SUMMARY_MAX_DAYS:
+        return FastJSONResponse(
+            {"error": f"Tarih aralığı en fazla {SHIFT_SUMMARY_MAX_DAYS} gün olabilir"}, status_code=400
+        )
+    unknown = unit_catalog.unknown(unit_name)
+    if unknown:
+        return FastJSONResponse({"error": f"Bilinmeyen hat: {', '.join(unknown)}"}, status_code=400)
+
+    complete_from = hourly_rollup.complete_from
+    from_rollup = complete_from is not None and datetime.combine(start_day, datetime.min.time()) >= complete_from
+    if not from_rollup:
+        log.info("Vardiya özeti %s - %s kısmen ham kayıtlardan okunuyor (rollup başlangıcı %s)",
+                 start_day, end_day, complete_from)
+
+    try:
+        # Uzun aralıklar saat önbelleğini doldurmasın diye doğrudan rollup'tan okunur
+        result_data = await run_in_read_db(
+            shifts.shift_summary,
+            hourly_rollup.fetch_hour_buckets,
+            model_cycle_times.target,
+            unit_name,
+            start_day,
+            end_day,
+            scheme,
+        )
+        return FastJSONResponse(
+            {
+                "data": result_data,
+                "scheme": scheme,
+                "shifts": shifts.SHIFT_SCHEMES[scheme],
+                "from_rollup": from_rollup,
+            }
+        )
+    except Exception as e:
+        log.error("Vardiya özeti hatası: %s", e)
+        return {"error": "Bir hata oluştu, lütfen logları kontrol edin."}
+
+
+@app.get("/export")
+async def export_records(
+    start_date: str = Query(..., description="Başlangıç tarihi (dahil)"),
+    end_date: str = Query(..., description="Bitiş tarihi (hariç)"),
+    unit_name: list[str] = Query(..., description="Üretim hattı adı"),
+    model: list[str] | None = Query(None, description="Yalnızca bu modeller"),
+    format: str = Query("csv", description="csv ya da ndjson"),
+):
+    """Ham kayıtları CSV / NDJSON olarak akıt (analiz için; sabit bellekle)."""
+    try:
+        start_dt = datetime.fromisoformat(start_date)
+        end_dt = datetime.fromisoformat(end_date)
+    except ValueError:
+        return FastJSONResponse({"error": "Geçersiz tarih"}, status_code=400)
+    if format not in export.FORMATS:
+        return FastJSONResponse({"error": f"Bilinmeyen biçim: {format}"}, status_code=400)
+    if end_dt <= start_dt or end_dt - start_dt > timedelta(days=export.EXPORT_MAX_DAYS):
+        return FastJSONResponse(
+            {"error": f"Tarih aralığı en fazla {export.EXPORT_MAX_DAYS} gün olabilir"}, status_code=400
+        )
+    unknown = unit_catalog.unknown(unit_name)
+    if unknown:
+        return FastJSONResponse({"error": f"Bilinmeyen hat: {', '.join(unknown)}"}, status_code=400)
+    if not export.export_slots.acquire(blocking=False):
+        return FastJSONResponse(
+            {"error": "Aynı anda çok fazla dışa aktarma var, lütfen sonra tekrar deneyin."}, status_code=429
+        )
+
+    filename = f"export_{start_dt:%Y%m%d%H%M}_{end_dt:%Y%m%d%H%M}.{format}"
+    return export.ExportResponse(
+        export.stream_records(unit_name, start_dt, end_dt, model, format),
+        media_type=export.FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
 # Aktif WebSocket'ler listesi
 active_websockets = set()
 
+# Canlı yayın sıklığı (saniye); sorgu maliyeti yeni kayıt sayısıyla orantılı
+LIVE_TICK_SECONDS = float(os.getenv("LIVE_TICK_SECONDS", "5"))
+
+# Son bir saatin (hat, gün, saat, model) sayaçları, artımlı güncellenir (ingest.py)
+live_counters = LiveProductionCounters(window_hours=1, rollup=hourly_rollup)
+
+
+def build_live_payload(db: Session) -> dict:
+    """Son bir saatin hat/saat bazlı verisini hesapla (tüm istemciler için tek sefer)."""
+    # Yalnızca son birkaç dakikanın kayıtları okunur, veri bellekteki sayaçlardan üretilir
+    live_counters.refresh(db)
+    rows = live_counters.model_rows()
+
+    # Yeni görülen hat/modeller kataloğa eklenir
+    unit_catalog.merge((row[0], row[3]) for row in rows)
+
+    # Metrikler HTTP endpoint'iyle aynı modülde hesaplanır
+    columns = oee.columns_from_rows(rows, model_cycle_times.target)
+    grouped_data = oee.hourly_entries(oee.hourly_metrics(columns), with_date=True)
+
+    # Wrap the data in the same structure as the HTTP endpoint
+    response_data = {"data": grouped_data}
+    ws_log.debug("Sending data structure: %s", response_data)
+    return response_data
+
+
+async def produce_live_payload() -> dict:
+    return await run_in_db(build_live_payload)
+
+
+def start_background_jobs():
+    if ROLLUP_ENABLED:
+        hourly_rollup.start()
+    unit_catalog.start()
+    model_cycle_times.start()
+
+
+async def stop_background_jobs():
+    await model_cycle_times.stop()
+    await unit_catalog.stop()
+    await hourly_rollup.stop()
+
+
+async def on_fanout_role(role: str):
+    """Arka plan görevleri liderde çalışır; takipçi aynı tabloya yazmaz, DB'yi yoklamaz."""
+    if role == "leader":
+        start_background_jobs()
+    else:
+        await stop_background_jobs()
+
+
+def fanout_state() -> dict:
+    return {
+        "rollup": hourly_rollup.state(),
+        "catalog": unit_catalog.state(),
+        "cycle_times": model_cycle_times.state(),
+        # Takipçiler /hourly-production/ ETag'lerini DB'ye gitmeden bu sürümlerle üretir
+        "live": live_counters.state(),
+    }
+
+
+def load_fanout_state(state: dict):
+    """Liderden gelen durumu uygula; mesajda yalnızca değişen anahtarlar olabilir."""
+    for key, target in (
+        ("rollup", hourly_rollup),
+        ("catalog", unit_catalog),
+        ("cycle_times", model_cycle_times),
+        ("live", live_counters),
+    ):
+        if key in state:
+            target.load_state(state[key])
+
+
+# Çok işçili dağıtımda (FANOUT_ENABLED=1) yük ve arka plan görevleri yalnızca lider işçide çalışır
+shared_producer = SharedProducer(
+    produce_live_payload,
+    interval=LIVE_TICK_SECONDS,
+    has_clients=lambda: bool(active_websockets),
+    on_payload=lambda: production_hub.wakeup(),
+    state=fanout_state,
+    on_state=load_fanout_state,
+    on_role=on_fanout_role,
+)
+
+# Tüm soketlere tek üretici görevden yayın yapılır
+production_hub = ProductionBroadcaster(
+    active_websockets,
+    shared_producer.produce if FANOUT_ENABLED else produce_live_payload,
+    interval=LIVE_TICK_SECONDS,
+)
+
 
 async def send_production_data(websocket: WebSocket):
     await websocket.accept()
-    active_websockets.add(websocket)
-    logging.info(f"Yeni WebSocket bağlantısı: {websocket.client}")
+    ws_log.info("Yeni WebSocket bağlantısı: %s", websocket.client)
 
     try:
+        # ?unit_name=A&unit_name=B ile yalnızca seçilen hatlara abone olunur
+        await production_hub.register(websocket, websocket.query_params.getlist("unit_name"))
         while True:
-            db = next(get_db())
+            message = await websocket.receive_text()
             try:
-                # First, get model-specific data
-                model_query = text("""
-                    SELECT
-                        UnitName,
-                        DATEPART(HOUR, KayitTarihi) AS Hour,
-                        Model,
-                        COUNT(*) AS ModelProduction,
-                        AVG(ModelSuresiSN) AS Target
-                    FROM dbo.ProductRecordLog
-                    WHERE KayitTarihi >= DATEADD(HOUR, -1, GETDATE())
-                    GROUP BY UnitName, DATEPART(HOUR, KayitTarihi), Model
-                    ORDER BY UnitName, Hour, Model
-                """)
-                model_result = db.execute(model_query).fetchall()
-
-                # Group model data by unit and hour
-                hour_model_data: dict[tuple[str, int], list[dict[str, any]]] = {}
-                for row in model_result:
-                    if row is None:
-                        continue
-                    unit_name = row[0]
-                    hour = row[1]
-                    model = row[2]
-                    model_prod = row[3]
-                    target = row[4] or 0
-
-                    key = (unit_name, hour)
-                    if key not in hour_model_data:
-                        hour_model_data[key] = []
-                    hour_model_data[key].append({
-                        "model": model,
-                        "model_production": model_prod,
-                        "target": target
-                    })
-
-                # Get summary data for quality calculation
-                summary_query = text("""
-                    SELECT
-                        UnitName,
-                        DATEPART(HOUR, KayitTarihi) AS Hour,
-                        COUNT(*) AS TotalCount,
-                        SUM(CASE WHEN TestSonucu = 1 THEN 1 ELSE 0 END) AS SuccessCount,
-                        SUM(CASE WHEN TestSonucu = 0 THEN 1 ELSE 0 END) AS FailCount
-                    FROM dbo.ProductRecordLog
-                    WHERE KayitTarihi >= DATEADD(HOUR, -1, GETDATE())
-                    GROUP BY UnitName, DATEPART(HOUR, KayitTarihi)
-                    ORDER BY UnitName, Hour
-                """)
-                summary_result = db.execute(summary_query).fetchall()
-
-                # Calculate metrics and group by unit
-                grouped_data = {}
-                now = datetime.now()
-                base_date = now.replace(minute=0, second=0, microsecond=0)
-
-                for row in summary_result:
-                    unit_name = row[0]
-                    hour = row[1]
-                    total = row[2]
-                    success = row[3]
-                    fail = row[4]
-
-                    # Calculate quality
-                    quality = (success / total) if total > 0 else 0
-
-                    # Calculate performance using model data
-                    elapsed_seconds = calculate_elapsed_seconds(hour, base_date)
-                    total_performance = 0
-                    logging.info(f"[PERF DEBUG] Unit {unit_name}, Hour {hour} - Elapsed seconds: {elapsed_seconds}")
-
-                    # Get model data for this unit and hour
-                    models = hour_model_data.get((unit_name, hour), [])
-                    logging.info(f"[PERF DEBUG] Models for unit {unit_name}, hour {hour}: {models}")
-
-                    for m in models:
-                        model_prod = m["model_production"]
-                        target = m["target"]
-                        logging.info(f"[PERF DEBUG] Model {m['model']}: Production={model_prod}, Target={target}")
-
-                        if target and target > 0:
-                            # Calculate target units per hour from cycle time
-                            target_per_hour = 3600 / target  # target is cycle time in seconds
-                            if elapsed_seconds > 0:
-                                # Calculate actual production rate
-                                actual_rate = model_prod  # This is already per hour since we group by hour
-                                # Performance is actual/target ratio
-                                performance_contribution = actual_rate / target_per_hour
-                                total_performance += performance_contribution
-                                logging.info(f"[PERF DEBUG] Model {m['model']}: Cycle={target:.1f}s, Target/h={target_per_hour:.1f}, Actual={actual_rate}, Perf={performance_contribution:.2f}")
-                            else:
-                                logging.warning(f"[PERF DEBUG] Elapsed seconds is 0 for unit {unit_name}, hour {hour}")
-                        else:
-                            logging.warning(f"[PERF DEBUG] Invalid target for model {m['model']}: {target}")
-
-                    # Calculate OEE
-                    performance = total_performance
-                    oee = quality * performance
-                    logging.info(f"[PERF DEBUG] Final values - Performance: {performance:.2f}, Quality: {quality:.2f}, OEE: {oee:.2f}")
-
-                    entry = {
-                        "hour": hour,
-                        "total": total,
-                        "success": success,
-                        "fail": fail,
-                        "quality": round(quality, 2),
-                        "performance": round(performance, 2),
-                        "oee": round(oee, 2)
-                    }
-
-                    if unit_name not in grouped_data:
-                        grouped_data[unit_name] = []
-                    grouped_data[unit_name].append(entry)
-
-                try:
-                    # Wrap the data in the same structure as the HTTP endpoint
-                    response_data = {"data": grouped_data}
-                    logging.info(f"[WS DEBUG] Sending data structure: {response_data}")
-                    await websocket.send_text(json.dumps(response_data))
-                except RuntimeError as e:
-                    logging.error(f"WebSocket gönderme hatası: {e}")
-                    break
-
-                await asyncio.sleep(30)
-
-            except Exception as e:
-                logging.error(f"WebSocket veri gönderme hatası: {e}")
-                try:
-                    await websocket.send_text(
-                        json.dumps({"error": "Veri çekme hatası"})
-                    )
-                except:
-                    pass
-                break
-            finally:
-                db.close()
-
+                request = json.loads(message)
+            except ValueError:
+                continue
+            # İstemci sıra numarasında boşluk görürse yeni snapshot ister
+            if isinstance(request, dict) and request.get("type") == "resync":
+                await production_hub.send_snapshot(websocket)
     except WebSocketDisconnect:
-        logging.info(f"WebSocket bağlantısı kesildi: {websocket.client}")
+        ws_log.info("WebSocket bağlantısı kesildi: %s", websocket.client)
     finally:
-        active_websockets.discard(websocket)
+        production_hub.unregister(websocket)
 
 
 @app.websocket("/ws/production")
 async def websocket_endpoint(websocket: WebSocket):
     await send_production_data(websocket)
+
+
+# Okunduğu anda hesaplanan göstergeler (benchmark engine'i değiştirebilir, bu yüzden her seferinde database.engine)
+metrics.WEBSOCKET_CLIENTS.set_function(lambda: len(active_websockets))
+metrics.MODELS_WITHOUT_TARGET.set_function(lambda: len(model_cycle_times.missing))
+metrics.DB_POOL_CHECKED_OUT.set_function(lambda: database.engine.pool.checkedout())
+metrics.DB_POOL_SIZE.set_function(lambda: database.engine.pool.size())
+
+
+@app.get("/pool-stats")
+def get_pool_stats():
+    """DB havuzlarının ve sorgu iş parçacıklarının anlık durumu."""
+    return {"data": {"pools": database.pool_stats(), "workers": database.DB_MAX_WORKERS}}
+
+
+@app.get("/metrics")
+def get_metrics():
+    """Prometheus metin formatında uygulama metrikleri."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
\ No newline at end of file
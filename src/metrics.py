@@ -0,0 +1,168 @@
+"""Prometheus metin formatında basit metrikler (/metrics).
+
+Harici bağımlılık gerektirmeyen küçük bir Counter/Gauge/Histogram
+uygulamasıdır; DB iş parçacıkları ile event loop aynı anda yazabilir.
+"""
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Callable
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+ROW_BUCKETS = (0, 1, 10, 100, 1000, 10000, 100000)
+
+_registry: list["_Metric"] = []
+
+
+def _format_labels(labels: tuple[tuple[str, str], ...]) -> str:
+    if not labels:
+        return ""
+    parts = ",".join(
+        f'{key}="{str(value).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+        for key, value in labels
+    )
+    return "{" + parts + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric(ABC):
+    kind = ""
+
+    def __init__(self, name: str, documentation: str):
+        self.name = name
+        self.documentation = documentation
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    @abstractmethod
+    def samples(self) -> list[str]:
+        """Metriğin Prometheus örnek satırları."""
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        return "\n".join(lines + self.samples())
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str):
+        super().__init__(name, documentation)
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self) -> list[str]:
+        with self._lock:
+            return [
+                f"{self.name}{_format_labels(key)} {_format_value(value)}"
+                for key, value in self._values.items()
+            ]
+
+
+class Gauge(_Metric):
+    """Anlık değer; `set_function` ile okunduğu anda hesaplanabilir."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, function: Callable[[], float] | None = None):
+        super().__init__(name, documentation)
+        self._values: dict[tuple, float] = {}
+        self._function = function
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[tuple(sorted(labels.items()))] = value
+
+    def set_function(self, function: Callable[[], float]):
+        self._function = function
+
+    def samples(self) -> list[str]:
+        if self._function is not None:
+            try:
+                return [f"{self.name} {_format_value(self._function())}"]
+            except Exception:
+                return []
+        with self._lock:
+            return [
+                f"{self.name}{_format_labels(key)} {_format_value(value)}"
+                for key, value in self._values.items()
+            ]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, buckets: tuple = LATENCY_BUCKETS):
+        super().__init__(name, documentation)
+        self.buckets = tuple(buckets) + (float("inf"),)
+        # Etiketler -> [kova sayıları, toplam, adet]
+        self._values: dict[tuple, list] = {}
+
+    def observe(self, value: float, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[0][i] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self) -> list[str]:
+        lines = []
+        with self._lock:
+            for key, (counts, total, count) in self._values.items():
+                for bound, bucket_count in zip(self.buckets, counts):
+                    labels = _format_labels(key + (("le", _format_value(bound)),))
+                    lines.append(f"{self.name}_bucket{labels} {bucket_count}")
+                lines.append(f"{self.name}_sum{_format_labels(key)} {_format_value(total)}")
+                lines.append(f"{self.name}_count{_format_labels(key)} {count}")
+        return lines
+
+
+def render() -> str:
+    return "\n".join(metric.render() for metric in _registry) + "\n"
+
+
+# ✅ Uygulama metrikleri
+DB_QUERY_SECONDS = Histogram("dashboard_db_query_seconds", "Sorgu süresi (execute + fetch), sorgu adına göre")
+DB_ROWS = Histogram("dashboard_db_rows", "Sorgunun döndürdüğü satır sayısı", buckets=ROW_BUCKETS)
+DB_POOL_CHECKOUT_SECONDS = Histogram(
+    "dashboard_db_pool_checkout_seconds", "Havuzdan bağlantı almak için beklenen süre"
+)
+DB_POOL_CHECKED_OUT = Gauge("dashboard_db_pool_checked_out", "Kullanımdaki bağlantı sayısı")
+DB_POOL_SIZE = Gauge("dashboard_db_pool_size", "Havuz boyutu")
+WEBSOCKET_CLIENTS = Gauge("dashboard_websocket_clients", "Bağlı WebSocket istemcisi sayısı")
+WS_SEND_SECONDS = Histogram("dashboard_ws_send_seconds", "Tek istemciye gönderim süresi")
+WS_BROADCAST_SECONDS = Histogram("dashboard_ws_broadcast_seconds", "Bir tick'in tüm istemcilere dağıtım süresi")
+WS_DROPPED_CLIENTS = Counter("dashboard_ws_dropped_clients_total", "Yavaş/kopmuş olduğu için düşürülen istemciler")
+MODELS_WITHOUT_TARGET = Gauge("dashboard_models_without_target", "Hedef çevrim süresi bulunamayan model sayısı")
+JSON_ENCODE_SECONDS = Histogram("dashboard_json_encode_seconds", "JSON serileştirme süresi, mesaj tipine göre")
+
+
+def fetchall(db, name: str, query, params: dict | None = None) -> list:
+    """`db.execute(...).fetchall()` çağrısını süre ve satır metrikleriyle çalıştır."""
+    with DB_QUERY_SECONDS.time(query=name):
+        rows = db.execute(query, params or {}).fetchall()
+    DB_ROWS.observe(len(rows), query=name)
+    return rows
@@ -0,0 +1,98 @@
+"""dbo.ProductRecordLog için indeks migrasyonu.
+
+Uygulamanın tüm ham kayıt sorguları yalnızca KayitTarihi üzerinde yarı açık
+aralıkla ([start, end), datetime parametre) filtreler; saat/gün ifadeleri
+sadece gruplamada kullanılır. Bu sorguların seek yapabilmesi için:
+
+- IX_ProductRecordLog_Unit_Tarih (UnitName, KayitTarihi) INCLUDE (Model, ModelSuresiSN, TestSonucu):
+  hat seçili sorgular (/hourly-production/, /shift-summary, /export)
+- IX_ProductRecordLog_Tarih (KayitTarihi) INCLUDE (UnitName, Model, ModelSuresiSN, TestSonucu):
+  tüm hatları okuyan sorgular (canlı yayın, rollup, hat kataloğu)
+
+`--hour-column` ile ayrıca kalıcı (PERSISTED) hesaplanmış saat başı sütunu
+KayitSaati eklenir; rapor araçları saat gruplamasını bu sütunla yapabilir.
+Uygulamanın sorguları bu sütuna ihtiyaç duymaz.
+
+Her adım idempotenttir; tekrar çalıştırmak mevcut nesnelere dokunmaz.
+Sonucu `python plan_check.py` ile doğrulayın.
+
+Kullanım (src klasöründen):
+    python migrations.py --dry-run
+    python migrations.py
+    python migrations.py --hour-column --online
+"""
+import argparse
+
+from sqlalchemy import text
+
+import database
+from applog import get_logger
+
+log = get_logger("app")
+
+TABLE = "ProductRecordLog"
+HOUR_COLUMN = "KayitSaati"
+
+# İndeks adı -> (anahtar sütunlar, INCLUDE sütunları)
+INDEXES = {
+    "IX_ProductRecordLog_Unit_Tarih": (["UnitName", "KayitTarihi"], ["Model", "ModelSuresiSN", "TestSonucu"]),
+    "IX_ProductRecordLog_Tarih": (["KayitTarihi"], ["UnitName", "Model", "ModelSuresiSN", "TestSonucu"]),
+}
+
+
+def statements(dialect: str, hour_column: bool = False, online: bool = False) -> list[str]:
+    """Lehçeye göre migrasyon SQL'leri (her biri ayrı çalıştırılır)."""
+    if dialect == "sqlite":
+        # Yerel kopya (benchmark): INCLUDE yok, sütunlar anahtara eklenir; hesaplanmış sütun atlanır
+        return [
+            f"CREATE INDEX IF NOT EXISTS dbo.{name} ON {TABLE} ({', '.join(keys + include)})"
+            for name, (keys, include) in INDEXES.items()
+        ]
+
+    result = []
+    if hour_column:
+        # KayitTarihi datetime olduğu için ifade deterministiktir ve PERSISTED olabilir
+        result.append(
+            f"IF COL_LENGTH('dbo.{TABLE}', '{HOUR_COLUMN}') IS NULL "
+            f"ALTER TABLE dbo.{TABLE} ADD {HOUR_COLUMN} AS "
+            f"DATEADD(HOUR, DATEDIFF(HOUR, 0, KayitTarihi), 0) PERSISTED"
+        )
+    options = " WITH (ONLINE = ON)" if online else ""
+    for name, (keys, include) in INDEXES.items():
+        result.append(
+            f"IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = '{name}' "
+            f"AND object_id = OBJECT_ID('dbo.{TABLE}')) "
+            f"CREATE NONCLUSTERED INDEX {name} ON dbo.{TABLE} ({', '.join(keys)}) "
+            f"INCLUDE ({', '.join(include)}){options}"
+        )
+    return result
+
+
+def upgrade(engine, hour_column: bool = False, online: bool = False) -> list[str]:
+    """Migrasyonu uygula, çalıştırılan SQL'leri döndür."""
+    sqls = statements(engine.dialect.name, hour_column, online)
+    for sql in sqls:
+        # Büyük tabloda indeks oluşturmak uzun sürer; her adım kendi işleminde
+        with engine.begin() as conn:
+            conn.execute(text(sql))
+        log.info("Migrasyon adımı uygulandı: %s", sql)
+    return sqls
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="dbo.ProductRecordLog indekslerini oluştur")
+    parser.add_argument("--hour-column", action="store_true", help=f"kalıcı {HOUR_COLUMN} sütununu ekle")
+    parser.add_argument("--online", action="store_true", help="ONLINE = ON (Enterprise sürümü gerekir)")
+    parser.add_argument("--dry-run", action="store_true", help="yalnızca SQL'i yazdır")
+    args = parser.parse_args()
+
+    if args.dry_run:
+        for sql in statements(database.engine.dialect.name, args.hour_column, args.online):
+            print(sql + ";")
+        return
+    upgrade(database.engine, args.hour_column, args.online)
+    print("✅ Migrasyon tamamlandı.")
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, DateTime, Integer
+from sqlalchemy import BigInteger, Column, Date, DateTime, Integer, String
 from sqlalchemy.ext.declarative import declarative_base
 
 Base = declarative_base()
@@ -10,3 +10,25 @@ class ProductionData(Base):
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     timestamp = Column(DateTime)
     count = Column(Integer)
+
+
+class ProductionHourlyRollup(Base):
+    """dbo.ProductRecordLog kayıtlarının (hat, gün, saat, model) bazlı saatlik özeti.
+
+    rollup.py tarafından arka planda doldurulur; geçmiş ve haftalık görünümler
+    milyonlarca ham kayıt yerine bu tablodan okunur.
+    """
+
+    __tablename__ = "ProductionHourlyRollup"
+
+    UnitName = Column(String(100), primary_key=True)
+    Day = Column(Date, primary_key=True)
+    Hour = Column(Integer, primary_key=True)
+    Model = Column(String(100), primary_key=True)  # NULL model '' olarak saklanır
+    HourStart = Column(DateTime, nullable=False, index=True)
+    ModelProduction = Column(Integer, nullable=False)
+    CycleSum = Column(BigInteger)  # ModelSuresiSN toplamı
+    CycleCount = Column(Integer)  # ModelSuresiSN dolu kayıt sayısı
+    SuccessCount = Column(Integer, nullable=False)
+    FailCount = Column(Integer, nullable=False)
+    UpdatedAt = Column(DateTime)
@@ -0,0 +1,184 @@
+"""Kalite / performans / OEE hesapları (HTTP ve WebSocket ortak).
+
+Girdi model bazlı sütunlardır (hat, saat, adet, hedef, başarılı, hatalı,
+geçen süre); hedefler cycle_times.py kataloğundan gelir. Hesaplar NumPy ile
+grup bazında, döngüsüz yapılır:
+
+- Quality = başarılı / toplam (toplam > 0 değilse 0)
+- Model katkısı = adet * (3600 / Target) / geçen saniye
+- Performance = model katkılarının toplamı
+- OEE = Quality × Performance
+"""
+from datetime import datetime
+from typing import Callable, Sequence
+
+import numpy as np
+
+HOURS_PER_DAY = 24
+
+
+def columns_from_rows(
+    rows: Sequence[tuple],
+    target_of: Callable[[str | None], float],
+    now: datetime | None = None,
+) -> dict[str, np.ndarray]:
+    """Model satırlarını (crud.ModelRow) NumPy sütunlarına çevir.
+
+    Satırlar sorgu sonucundan geldiği gibi tek NumPy dizisine alınır; satır
+    başına Python döngüsü yoktur. `target_of` modelin hedef çevrim süresini (saniye, yoksa 0)
+    döndürür ve her model için bir kez çağrılır. Geçen süre saat başından
+    `now`a kadardır (0-3600 sn).
+    """
+    now = now or datetime.now()
+    if not rows:
+        return {
+            "unit": np.array([], dtype=object), "date": np.array([], dtype=object),
+            "hour": np.array([], dtype=np.int64), "model": np.array([], dtype=object),
+            **{name: np.array([], dtype=np.float64) for name in ("count", "target", "success", "fail", "elapsed")},
+        }
+    # Tek geçişte (n, 7) nesne dizisi; sütunlar bu diziden dilimlenir
+    table = np.array(rows, dtype=object)
+    unit, date, model = table[:, 0], table[:, 1], table[:, 3]
+    hour = table[:, 2].astype(np.int64)
+
+    # Gün metinleri bir kez ayrıştırılır; satırlar sözlükten indekslenir
+    day_index = {day: i for i, day in enumerate(set(date.tolist()))}
+    days = np.array(list(day_index), dtype="datetime64[s]")
+    day_idx = np.fromiter(map(day_index.__getitem__, date), dtype=np.int64, count=len(date))
+    hour_start = days[day_idx] + hour * np.timedelta64(1, "h")
+    elapsed = np.clip((np.datetime64(now, "s") - hour_start).astype(np.int64), 0, 3600)
+
+    targets = {name: target_of(name) for name in set(model)}
+    return {
+        "unit": unit,
+        "date": date,
+        "hour": hour,
+        "model": model,
+        "count": table[:, 4].astype(np.float64),
+        "target": np.fromiter(map(targets.__getitem__, model), dtype=np.float64, count=len(model)),
+        "success": table[:, 5].astype(np.float64),
+        "fail": table[:, 6].astype(np.float64),
+        "elapsed": elapsed.astype(np.float64),
+    }
+
+
+def hourly_metrics(columns: dict[str, np.ndarray], by_date: bool = False) -> dict[str, np.ndarray]:
+    """Model sütunlarını (hat, saat) gruplarına indirip metrikleri hesapla.
+
+    Aynı saat birden fazla günde geçiyorsa tek grupta toplanır; `by_date`
+    ile her gün ayrı gruptur. Gruplar girdideki ilk görülme sırasıyla döner;
+    `completed` saatin tamamen geçtiğini gösterir.
+    """
+    unit_names, unit_idx = np.unique(columns["unit"].astype(str), return_inverse=True)
+    group_idx = unit_idx.astype(np.int64)
+    if by_date:
+        dates, date_idx = np.unique(columns["date"].astype(str), return_inverse=True)
+        group_idx = group_idx * len(dates) + date_idx
+    key = group_idx * HOURS_PER_DAY + columns["hour"]
+    keys, first, group = np.unique(key, return_index=True, return_inverse=True)
+    n = len(keys)
+
+    count, target, elapsed = columns["count"], columns["target"], columns["elapsed"]
+    total = np.bincount(group, weights=count, minlength=n)
+    success = np.bincount(group, weights=columns["success"], minlength=n)
+    fail = np.bincount(group, weights=columns["fail"], minlength=n)
+
+    # Hedefi ya da geçen süresi olmayan modeller performansa katılmaz
+    valid = (target > 0) & (elapsed > 0)
+    contribution = np.zeros(len(count))
+    np.divide(count * 3600.0, target * elapsed, out=contribution, where=valid)
+    performance = np.bincount(group, weights=contribution, minlength=n)
+
+    quality = np.zeros(n)
+    np.divide(success, total, out=quality, where=total > 0)
+    oee = quality * performance
+
+    group_elapsed = np.zeros(n)
+    np.maximum.at(group_elapsed, group, elapsed)
+
+    order = np.argsort(first, kind="stable")
+    return {
+        "unit": columns["unit"][first][order].astype(str),
+        "date": columns["date"][first][order],
+        "hour": (keys % HOURS_PER_DAY)[order],
+        "total": total[order],
+        "success": success[order],
+        "fail": fail[order],
+        "quality": quality[order],
+        "performance": performance[order],
+        "oee": oee[order],
+        "completed": (group_elapsed >= 3600)[order],
+    }
+
+
+def shift_metrics(hourly: dict[str, np.ndarray]) -> dict[str, dict]:
+    """Hat bazında vardiya özeti.
+
+    Quality tüm saatlerin toplamından, Performance ve OEE ise yalnızca
+    tamamlanmış saatlerin ortalamasından hesaplanır (açık saat ortalamayı
+    yapay olarak düşürmesin).
+    """
+    return summary_metrics(hourly, hourly["unit"].astype(str))
+
+
+def summary_metrics(hourly: dict[str, np.ndarray], keys: np.ndarray) -> dict[str, dict]:
+    """`shift_metrics` hesabını verilen anahtarlara (örn. hat + vardiya) göre grupla."""
+    unit_names, unit_idx = np.unique(keys, return_inverse=True)
+    n = len(unit_names)
+    total = np.bincount(unit_idx, weights=hourly["total"], minlength=n)
+    success = np.bincount(unit_idx, weights=hourly["success"], minlength=n)
+    fail = np.bincount(unit_idx, weights=hourly["fail"], minlength=n)
+    completed = hourly["completed"].astype(np.float64)
+    completed_hours = np.bincount(unit_idx, weights=completed, minlength=n)
+    performance_sum = np.bincount(unit_idx, weights=hourly["performance"] * completed, minlength=n)
+    oee_sum = np.bincount(unit_idx, weights=hourly["oee"] * completed, minlength=n)
+
+    quality = np.zeros(n)
+    np.divide(success, total, out=quality, where=total > 0)
+    performance = np.zeros(n)
+    np.divide(performance_sum, completed_hours, out=performance, where=completed_hours > 0)
+    oee = np.zeros(n)
+    np.divide(oee_sum, completed_hours, out=oee, where=completed_hours > 0)
+
+    return {
+        unit: {
+            "total": int(total[i]),
+            "success": int(success[i]),
+            "fail": int(fail[i]),
+            "completed_hours": int(completed_hours[i]),
+            "quality": round(float(quality[i]), 2),
+            "performance": round(float(performance[i]), 2),
+            "oee": round(float(oee[i]), 2),
+        }
+        for i, unit in enumerate(unit_names.tolist())
+    }
+
+
+def hourly_entries(hourly: dict[str, np.ndarray], with_date: bool = False) -> dict[str, list[dict]]:
+    """Hesaplanan grupları API'nin döndürdüğü hat -> saat satırları yapısına çevir."""
+    columns = [
+        hourly["unit"].tolist(),
+        hourly["date"].tolist(),
+        hourly["hour"].tolist(),
+        hourly["total"].astype(np.int64).tolist(),
+        hourly["success"].astype(np.int64).tolist(),
+        hourly["fail"].astype(np.int64).tolist(),
+        np.round(hourly["quality"], 2).tolist(),
+        np.round(hourly["performance"], 2).tolist(),
+        np.round(hourly["oee"], 2).tolist(),
+    ]
+    result: dict[str, list[dict]] = {}
+    for unit, date, hour, total, success, fail, quality, performance, oee in zip(*columns):
+        entry = {
+            "hour": hour,
+            "total": total,
+            "success": success,
+            "fail": fail,
+            "quality": quality,
+            "performance": performance,
+            "oee": oee,
+        }
+        if with_date:
+            entry = {"date": date, **entry}
+        result.setdefault(unit, []).append(entry)
+    return result
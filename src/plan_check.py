@@ -0,0 +1,150 @@
+"""Uygulama sorgularının ProductRecordLog'a seek ile mi, tarama (scan) ile mi eriştiğini kontrol et.
+
+Sorgular crud.py fonksiyonlarından, uygulamanın gönderdiği SQL ve
+parametrelerle yakalanır (veritabanında çalıştırılmaz) ve tahmini planları
+alınır: MSSQL'de SET SHOWPLAN_XML ON, SQLite'ta EXPLAIN QUERY PLAN.
+ProductRecordLog üzerinde tarama varsa çıkış kodu 1'dir; önce
+`python migrations.py` çalıştırılmalıdır.
+
+Rollup'ın INSERT ... SELECT sorgusu yazma yaptığı için kontrol edilmez;
+filtresi `production_data` ile aynıdır.
+
+Kullanım (src klasöründen):
+    python plan_check.py
+    python plan_check.py --unit HAT-1 --unit HAT-2 --days 7
+    python plan_check.py --local   # sentetik SQLite kopyası (benchmarks.fixtures)
+"""
+import argparse
+import sys
+import xml.etree.ElementTree as ET
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+import crud
+
+TABLE = "ProductRecordLog"
+SHOWPLAN_NS = "{http://schemas.microsoft.com/sqlserver/2004/07/showplan}"
+
+# Sorgu adı -> (db, hatlar, başlangıç, bitiş) ile crud çağrısı
+QUERIES = {
+    "hour_buckets": lambda db, units, start, end: crud.fetch_hour_buckets(db, units, start, end),
+    "export": lambda db, units, start, end: next(crud.iter_records(db, units, start, end)),
+    "production_since": lambda db, units, start, end: crud.fetch_production_since(
+        db, end - timedelta(minutes=2), end
+    ),
+    "production_data": lambda db, units, start, end: crud.fetch_production_data(db, start, end),
+    "unit_models": lambda db, units, start, end: crud.fetch_unit_models(db, start),
+}
+
+
+class _Captured(Exception):
+    pass
+
+
+def capture(db: Session, call) -> tuple[str, tuple]:
+    """`call(db)`in göndereceği ilk sorguyu çalıştırmadan yakala."""
+    def on_execute(conn, cursor, statement, parameters, context, executemany):
+        raise _Captured(statement, parameters)
+
+    engine = db.get_bind()
+    event.listen(engine, "before_cursor_execute", on_execute)
+    try:
+        call(db)
+    except _Captured as captured:
+        return captured.args
+    finally:
+        event.remove(engine, "before_cursor_execute", on_execute)
+        db.rollback()
+    raise RuntimeError("Sorgu yakalanamadı")
+
+
+def mssql_plan(cursor, statement: str, parameters) -> list[tuple[str, bool]]:
+    """(işlem, ProductRecordLog taraması mı) listesi."""
+    cursor.execute("SET SHOWPLAN_XML ON")
+    try:
+        cursor.execute(statement, parameters)
+        plan = cursor.fetchone()[0]
+    finally:
+        cursor.execute("SET SHOWPLAN_XML OFF")
+
+    steps = []
+    for relop in ET.fromstring(plan).iter(f"{SHOWPLAN_NS}RelOp"):
+        physical = relop.get("PhysicalOp")
+        for child in relop:
+            obj = child.find(f"{SHOWPLAN_NS}Object")
+            if obj is None:
+                continue
+            table = obj.get("Table", "").strip("[]")
+            index = obj.get("Index", "").strip("[]")
+            steps.append((f"{physical} {table}.{index}".rstrip("."), table == TABLE and "Scan" in physical))
+    return steps
+
+
+def sqlite_plan(cursor, statement: str, parameters) -> list[tuple[str, bool]]:
+    cursor.execute(f"EXPLAIN QUERY PLAN {statement}", parameters)
+    steps = []
+    for row in cursor.fetchall():
+        detail = row[-1]
+        steps.append((detail, detail.startswith("SCAN") and TABLE in detail))
+    return steps
+
+
+def check(db: Session, units: list[str], start: datetime, end: datetime) -> bool:
+    """Tüm sorguların planlarını yazdır; hiçbiri taramıyorsa True."""
+    dialect = db.get_bind().dialect.name
+    explain = sqlite_plan if dialect == "sqlite" else mssql_plan
+    ok = True
+    for name, call in QUERIES.items():
+        statement, parameters = capture(db, lambda s: call(s, units, start, end))
+        cursor = db.connection().connection.cursor()
+        try:
+            steps = explain(cursor, statement, parameters)
+        finally:
+            cursor.close()
+        scans = [step for step, is_scan in steps if is_scan]
+        ok = ok and not scans
+        print(f"{'❌ SCAN' if scans else '✅ SEEK'}  {name}")
+        for step, is_scan in steps:
+            print(f"    {'!' if is_scan else ' '} {step}")
+    db.rollback()
+    return ok
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="ProductRecordLog sorgularının planlarını kontrol et")
+    parser.add_argument("--unit", action="append", help="hat adı (varsayılan: iki örnek hat)")
+    parser.add_argument("--days", type=int, default=1, help="kontrol edilen aralık (gün)")
+    parser.add_argument("--local", action="store_true", help="sentetik SQLite kopyasında kontrol et")
+    args = parser.parse_args()
+
+    units = args.unit or ["UNIT-00", "UNIT-01"]
+    end = datetime.now().replace(minute=0, second=0, microsecond=0)
+    start = end - timedelta(days=args.days)
+    # database içe aktarılırken engine kurulur: --local'da önce fixtures
+    # DATABASE_URL=sqlite:// ayarlar, ODBC sürücüsü gerekmez
+    if args.local:
+        from benchmarks import fixtures
+
+        import database
+
+        engine = fixtures.create_local_engine()
+        fixtures.seed_recent(engine, units, ["MDL-00", "MDL-01"], hours=24 * args.days, rows_per_hour=20)
+        # MSSQL'deki istatistiklerin karşılığı; yoksa SQLite aralığın seçiciliğini bilemez
+        with engine.begin() as conn:
+            conn.exec_driver_sql("ANALYZE")
+        db = database.SessionLocal(bind=engine)
+    else:
+        import database
+
+        db = database.SessionLocal()
+    try:
+        ok = check(db, units, start, end)
+    finally:
+        db.close()
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,181 @@
+"""ProductionHourlyRollup tablosunu güncel tutan arka plan görevi.
+
+Görev her ROLLUP_INTERVAL saniyede son ROLLUP_LOOKBACK_HOURS saati (açık
+saat dahil) ham kayıtlardan yeniden yazar; geç gelen kayıtlar da böylece
+düzelir. İlk çalışmada tablodaki son saatten (boşsa ROLLUP_BACKFILL_DAYS
+gün öncesinden) itibaren eksikler günlük parçalarla doldurulur.
+
+Okuma tarafı (`fetch_hour_buckets`) aralığın rollup'ta kesinleşmiş tam
+saatlerini tablodan, kalan baş/son kısmını ham kayıtlardan okur.
+
+Elle doldurma (src klasöründen):
+    python rollup.py --days 30
+    python rollup.py --start 2025-01-01 --end 2025-02-01
+"""
+import argparse
+import os
+from datetime import datetime, timedelta
+
+from sqlalchemy.orm import Session
+
+import crud
+from applog import get_logger
+from cache import CLOSE_GRACE
+from database import SessionLocal, run_in_db
+from models import ProductionHourlyRollup
+from tasks import PeriodicRefresh
+
+log = get_logger("rollup")
+
+# ✅ Rollup ayarları
+ROLLUP_ENABLED = os.getenv("ROLLUP_ENABLED", "1") == "1"
+ROLLUP_INTERVAL = float(os.getenv("ROLLUP_INTERVAL", "60"))
+ROLLUP_LOOKBACK_HOURS = int(os.getenv("ROLLUP_LOOKBACK_HOURS", "2"))
+# /shift-summary'nin en uzun aralığı (SHIFT_SUMMARY_MAX_DAYS) kadar geriye doldurulur
+ROLLUP_BACKFILL_DAYS = int(os.getenv("ROLLUP_BACKFILL_DAYS", "92"))
+ROLLUP_CHUNK_HOURS = 24
+
+
+def floor_hour(dt: datetime) -> datetime:
+    return dt.replace(minute=0, second=0, microsecond=0)
+
+
+def ceil_hour(dt: datetime) -> datetime:
+    hour = floor_hour(dt)
+    return hour if hour == dt else hour + timedelta(hours=1)
+
+
+def backfill(db: Session, start: datetime, end: datetime, chunk_hours: int = ROLLUP_CHUNK_HOURS) -> int:
+    """[start, end) aralığını parça parça yeniden yaz (her parça ayrı işlem)."""
+    start, end = floor_hour(start), ceil_hour(end)
+    written = 0
+    chunk = start
+    while chunk < end:
+        chunk_end = min(chunk + timedelta(hours=chunk_hours), end)
+        written += crud.refresh_rollup(db, chunk, chunk_end)
+        chunk = chunk_end
+    return written
+
+
+def ensure_table(db: Session):
+    ProductionHourlyRollup.__table__.create(bind=db.get_bind(), checkfirst=True)
+
+
+class HourlyRollup(PeriodicRefresh):
+    """Rollup tablosunun bakımı ve hangi saatlerin tablodan okunabileceği bilgisi.
+
+    `complete_from` ile `complete_until` arasındaki saatler tabloda kesinleşmiştir
+    (son yenilemede kapanmış saatler). Bu aralık bilinmeden (ilk yenilemeden
+    önce ya da görev kapalıyken) tüm okumalar ham kayıtlara gider. Çok işçili
+    dağıtımda tabloyu yalnızca lider yazar; takipçiler aralığı `load_state` ile alır.
+    """
+
+    def __init__(
+        self,
+        interval: float = ROLLUP_INTERVAL,
+        lookback_hours: int = ROLLUP_LOOKBACK_HOURS,
+        backfill_days: int = ROLLUP_BACKFILL_DAYS,
+    ):
+        super().__init__(interval, log, "Rollup yenileme hatası: %s")
+        self.lookback = timedelta(hours=lookback_hours)
+        self.backfill_days = backfill_days
+        self.complete_from: datetime | None = None
+        self.complete_until: datetime | None = None
+        self.refreshed_at: datetime | None = None
+
+    async def _run(self):
+        try:
+            await run_in_db(ensure_table)
+        except Exception as e:
+            log.error("Rollup tablosu oluşturulamadı, rollup kapalı: %s", e)
+            return
+        await super()._run()
+
+    def refresh(self, db: Session, now: datetime | None = None) -> int:
+        """Son saatleri (ve ilk çalışmada eksik günleri) yeniden yaz."""
+        now = now or datetime.now()
+        current = floor_hour(now)
+        start = current - self.lookback
+        if self.refreshed_at is None:
+            oldest = current - timedelta(days=self.backfill_days)
+            first, last = crud.fetch_rollup_bounds(db)
+            if last is None or last < oldest:
+                start = min(start, oldest)
+                complete_from = start
+            else:
+                start = min(start, last)
+                complete_from = first
+                if first > oldest:
+                    # ROLLUP_BACKFILL_DAYS artırıldıysa eski günler de doldurulur
+                    backfill(db, oldest, first)
+                    complete_from = oldest
+        else:
+            # Görev bir süre çalışamadıysa arayı da kapat
+            start = min(start, floor_hour(self.refreshed_at))
+            complete_from = self.complete_from
+
+        written = backfill(db, start, current + timedelta(hours=1))
+        self.complete_from = complete_from
+        self.complete_until = floor_hour(now - CLOSE_GRACE)
+        self.refreshed_at = now
+        log.debug("Rollup %s - %s yenilendi (%d satır)", start, current, written)
+        return written
+
+    def state(self) -> dict:
+        """Kesinleşmiş aralık; çok işçili dağıtımda takipçilere gönderilir (fanout.py)."""
+        return {
+            "from": self.complete_from.isoformat() if self.complete_from else None,
+            "until": self.complete_until.isoformat() if self.complete_until else None,
+        }
+
+    def load_state(self, state: dict):
+        """Liderin kesinleşmiş aralığını uygula; takipçi tabloya yazmaz."""
+        if state["until"] is not None:
+            self.complete_from = datetime.fromisoformat(state["from"])
+            self.complete_until = datetime.fromisoformat(state["until"])
+
+    def covered(self, start: datetime, end: datetime) -> tuple[datetime, datetime] | None:
+        """[start, end) içinde rollup'tan okunabilecek tam saat aralığı [lo, hi)."""
+        if self.complete_until is None:
+            return None
+        lo = max(ceil_hour(start), self.complete_from)
+        hi = min(floor_hour(end), self.complete_until)
+        return (lo, hi) if lo < hi else None
+
+    def fetch_hour_buckets(
+        self, db: Session, unit_names: list[str], start: datetime, end: datetime
+    ) -> dict[tuple[str, str, int], dict]:
+        """`crud.fetch_hour_buckets` yerine geçer; kesinleşmiş saatler rollup'tan okunur."""
+        covered = self.covered(start, end)
+        if covered is None:
+            return crud.fetch_hour_buckets(db, unit_names, start, end)
+
+        lo, hi = covered
+        buckets = crud.fetch_rollup_buckets(db, unit_names, lo, hi)
+        if start < lo:
+            buckets.update(crud.fetch_hour_buckets(db, unit_names, start, lo))
+        if hi < end:
+            buckets.update(crud.fetch_hour_buckets(db, unit_names, hi, end))
+        return buckets
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="ProductionHourlyRollup tablosunu doldur")
+    parser.add_argument("--days", type=int, default=ROLLUP_BACKFILL_DAYS, help="bugünden geriye gün sayısı")
+    parser.add_argument("--start", type=datetime.fromisoformat)
+    parser.add_argument("--end", type=datetime.fromisoformat)
+    args = parser.parse_args()
+
+    end = args.end or ceil_hour(datetime.now())
+    start = args.start or floor_hour(end - timedelta(days=args.days))
+    db = SessionLocal()
+    try:
+        ensure_table(db)
+        written = backfill(db, start, end)
+        print(f"✅ Rollup {start} - {end} dolduruldu ({written} satır).")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main_cli()
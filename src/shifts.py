@@ -0,0 +1,111 @@
+"""Vardiya tanımları ve vardiya / gün / hafta özetleri (/shift-summary).
+
+Tanımlar app.js'teki `timePeriods` ile aynıdır. Özetler saatlik
+toplamlardan (rollup + ham kayıt kuyruğu) hesaplanır, ham kayıtlardan değil.
+Gün, seçilen düzenin ilk vardiyasının başladığı saatte başlar (3x8: 00:00,
+2x12: 08:00); gece vardiyası başladığı güne yazılır.
+"""
+from datetime import date, datetime, timedelta
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+import crud
+import oee
+
+# Vardiya adı -> (başlangıç saati, süre saat); app.js timePeriods ile aynı
+SHIFTS = {
+    "08:00-16:00": (8, 8),
+    "16:00-24:00": (16, 8),
+    "24:00-08:00": (0, 8),
+    "08:00-20:00": (8, 12),
+    "20:00-08:00": (20, 12),
+}
+
+# Düzen -> günün vardiyaları (ilk vardiya günün başlangıcıdır)
+SHIFT_SCHEMES = {
+    "3x8": ["24:00-08:00", "08:00-16:00", "16:00-24:00"],
+    "2x12": ["08:00-20:00", "20:00-08:00"],
+}
+
+_SEP = "\t"
+
+
+def _shift_dates(dates: np.ndarray, hours: np.ndarray, start_hour: int) -> np.ndarray:
+    """Saat `start_hour`dan önceyse kayıt bir önceki güne (vardiyanın başladığı gün) aittir."""
+    return dates - (hours < start_hour).astype("timedelta64[D]")
+
+
+def _grouped(hourly: dict, units: np.ndarray, labels: np.ndarray, mask: np.ndarray) -> dict:
+    """(hat, etiket) bazında özet; {hat: {etiket: özet}}."""
+    keys = np.char.add(np.char.add(units[mask], _SEP), labels[mask])
+    sub = {name: column[mask] for name, column in hourly.items()}
+    result: dict[str, dict] = {}
+    for key, summary in oee.summary_metrics(sub, keys).items():
+        unit, label = key.split(_SEP, 1)
+        result.setdefault(unit, {})[label] = summary
+    return result
+
+
+def shift_summary(
+    db: Session,
+    fetch,
+    target_of,
+    unit_names: list[str],
+    start_day: date,
+    end_day: date,
+    scheme: str = "3x8",
+    now: datetime | None = None,
+) -> dict[str, dict]:
+    """[start_day, end_day] üretim günleri için hat bazında vardiya/gün/hafta/toplam özetleri.
+
+    `fetch` saatlik özetleri okuyan fonksiyondur (crud.fetch_hour_buckets imzası),
+    `target_of` modelin hedef çevrim süresini verir (ModelCycleTimes.target).
+    """
+    now = now or datetime.now()
+    day_start = SHIFTS[SHIFT_SCHEMES[scheme][0]][0]
+    start_dt = datetime.combine(start_day, datetime.min.time()) + timedelta(hours=day_start)
+    end_dt = datetime.combine(end_day + timedelta(days=1), datetime.min.time()) + timedelta(hours=day_start)
+
+    # Yarı açık aralık: bitiş anındaki kayıtlar ertesi güne ait
+    rows = crud.bucket_rows(fetch(db, unit_names, start_dt, end_dt).values())
+
+    result = {unit: {"shifts": [], "days": [], "weeks": [], "total": None} for unit in unit_names}
+    if not rows:
+        return result
+
+    hourly = oee.hourly_metrics(oee.columns_from_rows(rows, target_of, now), by_date=True)
+    units = hourly["unit"].astype(str)
+    dates = hourly["date"].astype("datetime64[D]")
+    hours = hourly["hour"]
+    everything = np.ones(len(units), dtype=bool)
+
+    for unit, summary in oee.shift_metrics(hourly).items():
+        result[unit]["total"] = summary
+
+    # Vardiyalar: her saat, düzendeki vardiyalardan birine düşer
+    for name in SHIFT_SCHEMES[scheme]:
+        shift_start, length = SHIFTS[name]
+        in_shift = (hours - shift_start) % 24 < length
+        labels = _shift_dates(dates, hours, shift_start).astype(str)
+        for unit, groups in _grouped(hourly, units, labels, in_shift).items():
+            result[unit]["shifts"].extend(
+                {"date": day, "shift": name, **summary} for day, summary in groups.items()
+            )
+
+    production_days = _shift_dates(dates, hours, day_start)
+    for unit, groups in _grouped(hourly, units, production_days.astype(str), everything).items():
+        result[unit]["days"] = [{"date": day, **summary} for day, summary in sorted(groups.items())]
+
+    # ISO haftası (Pazartesi başlangıçlı), örn. "2025-W02"
+    unique_days, day_idx = np.unique(production_days, return_inverse=True)
+    week_labels = np.array(
+        [f"{d.isocalendar()[0]}-W{d.isocalendar()[1]:02d}" for d in unique_days.astype(date)]
+    )[day_idx]
+    for unit, groups in _grouped(hourly, units, week_labels, everything).items():
+        result[unit]["weeks"] = [{"week": week, **summary} for week, summary in sorted(groups.items())]
+
+    order = {name: i for i, name in enumerate(SHIFT_SCHEMES[scheme])}
+    for unit_result in result.values():
+        unit_result["shifts"].sort(key=lambda entry: (entry["date"], order[entry["shift"]]))
+    return result
@@ -35,6 +35,12 @@ async function populateUnitCheckboxes() {
 
   try {
     let response = await fetch(`${API_BASE_URL}/unit-names`);
+    if (response.status === 503) {
+      // Sunucu yeni açıldı, hat kataloğu yükleniyor
+      checkboxContainer.innerHTML = "<p>Üretim hatları yükleniyor...</p>";
+      setTimeout(populateUnitCheckboxes, 5000);
+      return;
+    }
     let result = await response.json();
 
     if (result.unit_names && result.unit_names.length > 0) {
@@ -10,29 +10,42 @@ let ws;
 let charts = {}; // Grafikleri takip etmek için
 let unitDataStore = {}; // Tüm üretim verilerini saklayacağız
 let currentPeriod = null; // Track the current time period instead of just the hour
+let lastSeq = 0; // Son uygulanan WebSocket mesajının sıra numarası
+let resyncPending = false; // Snapshot beklenirken gelen patch'ler atlanır
 
 function connectWebSocket() {
   // Replace "http" with "ws" to create WebSocket URL
   const WS_BASE_URL = API_BASE_URL.replace("http", "ws");
-  ws = new WebSocket(`${WS_BASE_URL}/ws/production`);
+  // Yalnızca bu ekranda gösterilen hatlara abone ol
+  const query = new URLSearchParams();
+  (getQueryParams().unit_name || []).forEach((unit) => query.append("unit_name", unit));
+  ws = new WebSocket(`${WS_BASE_URL}/ws/production?${query.toString()}`);
 
   ws.onopen = () => console.log("✅ WebSocket bağlantısı açıldı.");
 
   ws.onmessage = (event) => {
     try {
-      let receivedData = JSON.parse(event.data);
-      console.log("📩 Gelen WebSocket verisi:", receivedData);
-
-      // Store the received data in the unitDataStore
-      Object.entries(receivedData).forEach(([unitName, data]) => {
-        unitDataStore[unitName] = data;
-
-        // Only update the UI if this unit is currently displayed
-        const tableElement = document.getElementById(`table-${unitName}`);
-        if (tableElement) {
-          updateExistingTables(unitName, data);
+      const message = JSON.parse(event.data);
+
+      if (message.type === "snapshot") {
+        // Bağlantı açılışında (veya resync sonrası) tam veri
+        lastSeq = message.seq;
+        resyncPending = false;
+        applyLiveData(message.data);
+      } else if (message.type === "patch") {
+        if (resyncPending) return;
+        if (message.prev > lastSeq) {
+          // Arada mesaj kaçırıldı, tam veriyi yeniden iste
+          console.warn(`⚠️ WebSocket sıra boşluğu (${lastSeq} -> ${message.prev}), yeniden senkronize ediliyor.`);
+          resyncPending = true;
+          ws.send(JSON.stringify({ type: "resync" }));
+          return;
         }
-      });
+        lastSeq = message.seq;
+        applyLiveData(message.data);
+      } else if (message.error) {
+        console.error("❌ WebSocket sunucu hatası:", message.error);
+      }
     } catch (error) {
       console.error("❌ WebSocket verisi işlenirken hata:", error);
     }
@@ -44,6 +57,30 @@ function connectWebSocket() {
   };
 }
 
+// Canlı satır seçili vardiya aralığına düşüyor mu?
+function isInDisplayedPeriod(entry) {
+  const params = getQueryParams();
+  if (!entry.date || !params.start_date || !params.end_date) return true;
+  const hourStart = new Date(`${entry.date}T${String(entry.hour).padStart(2, '0')}:00`);
+  const periodStart = new Date(params.start_date[0]);
+  periodStart.setMinutes(0, 0, 0);
+  return hourStart >= periodStart && hourStart < new Date(params.end_date[0]);
+}
+
+// Snapshot/patch satırlarını saat bazında mevcut verinin üzerine yaz
+function applyLiveData(data) {
+  Object.entries(data).forEach(([unitName, entries]) => {
+    const rowsByHour = new Map((unitDataStore[unitName] || []).map((row) => [row.hour, row]));
+    entries.filter(isInDisplayedPeriod).forEach((entry) => rowsByHour.set(entry.hour, entry));
+    unitDataStore[unitName] = [...rowsByHour.values()];
+
+    // Only update the UI if this unit is currently displayed
+    if (document.getElementById(`table-${unitName}`)) {
+      updateExistingTables(unitName, unitDataStore[unitName]);
+    }
+  });
+}
+
 connectWebSocket();
 
 // Function to update the global current time display
@@ -95,14 +132,22 @@ async function fetchAndShowResults() {
   }
 
   // Create unit cards
-  units.forEach(unit => createUnitCard(unit, start, end));
+  units.forEach(unit => createUnitCard(unit));
+
+  // Sayfaya gömülü ilk veri varsa istek atılmaz; sonraki yoklama ETag ile 304 alır
+  const hydrated = hydrateFromSnapshot(units, start, end);
+
+  // Kartlarda henüz WebSocket verisi yoksa tüm hatlar tek istekte getirilir
+  if (!hydrated && units.some((unit) => !(unitDataStore[unit] && unitDataStore[unit].length > 0))) {
+    fetchAllUnitData(units, start, end);
+  }
 
   // Initialize and update the global time
   updateGlobalTime();
   setInterval(updateGlobalTime, 60000); // Update the time every minute
 }
 
-function createUnitCard(unit, startDateTime, endDateTime) {
+function createUnitCard(unit) {
   let container = document.getElementById("grid-container");
   let div = document.createElement("div");
   div.className = "bg-white p-4 rounded-lg shadow-lg";
@@ -150,91 +195,86 @@ function createUnitCard(unit, startDateTime, endDateTime) {
   // Check if we already have real-time data for this unit from websocket
   if (unitDataStore[unit] && unitDataStore[unit].length > 0) {
     updateExistingTables(unit, unitDataStore[unit]);
-  } else {
-    // If not, fetch initial data from API
-    fetchUnitData(unit, startDateTime, endDateTime);
   }
 }
 
-async function fetchUnitData(unitName, startDateTime, endDateTime) {
+// Son cevabın ETag'i (istek URL'sine göre); veri değişmediyse sunucu 304 döner
+let lastFetchUrl = null;
+let lastETag = null;
+
+function hourlyProductionUrl(units, startDateTime, endDateTime) {
+  const query = new URLSearchParams({ start_date: startDateTime, end_date: endDateTime });
+  units.forEach((unit) => query.append("unit_name", unit));
+  return `${API_BASE_URL}/hourly-production/?${query.toString()}`;
+}
+
+// Sunucunun sayfaya gömdüğü ilk veriyi (results.html #initial-snapshot) uygula
+function hydrateFromSnapshot(units, startDateTime, endDateTime) {
+  const element = document.getElementById("initial-snapshot");
+  let snapshot = null;
   try {
-    let apiUrl = `${API_BASE_URL}/hourly-production/?start_date=${startDateTime}&end_date=${endDateTime}&unit_name=${unitName}`;
-    console.log(`[DEBUG] Fetching data from URL: ${apiUrl}`);
-    let response = await fetch(apiUrl);
-    let result = await response.json();
-    console.log(`[DEBUG] Raw API response:`, JSON.stringify(result, null, 2));
-
-    if (!result.error) {
-      // Check if data is in the new format (object with unit names as keys) or old format (array)
-      if (result.data && typeof result.data === 'object' && !Array.isArray(result.data)) {
-        // New format - multiple units selected
-        const unitData = result.data[unitName];
-        if (unitData) {
-          // Detailed inspection of the data - checking every entry for performance and OEE
-          unitData.forEach((entry, index) => {
-            console.log(`[DEBUG DETAIL] Unit ${unitName}, Hour ${entry.hour} data:`, {
-              performance: entry.performance,
-              quality: entry.quality,
-              oee: entry.oee,
-              type: {
-                performance: typeof entry.performance,
-                quality: typeof entry.quality,
-                oee: typeof entry.oee
-              },
-              isNull: {
-                performance: entry.performance === null,
-                quality: entry.quality === null,
-                oee: entry.oee === null
-              }
-            });
-          });
-
-          // Check if any items have performance and OEE data
-          const hasPerformanceData = unitData.some(item =>
-            item.hasOwnProperty('performance') && item.performance !== null && item.performance !== undefined);
-          const hasOEEData = unitData.some(item =>
-            item.hasOwnProperty('oee') && item.oee !== null && item.oee !== undefined);
-
-          console.log(`[API CHECK] Unit ${unitName} - Contains performance data: ${hasPerformanceData}, OEE data: ${hasOEEData}`);
-
-          updateExistingTables(unitName, unitData);
-        }
-      } else if (Array.isArray(result.data)) {
-        // Old format - single unit
-        // Detailed inspection of the data
-        result.data.forEach((entry, index) => {
-          console.log(`[DEBUG DETAIL] Unit ${unitName}, Hour ${entry.hour} data:`, {
-            performance: entry.performance,
-            quality: entry.quality,
-            oee: entry.oee,
-            type: {
-              performance: typeof entry.performance,
-              quality: typeof entry.quality,
-              oee: typeof entry.oee
-            },
-            isNull: {
-              performance: entry.performance === null,
-              quality: entry.quality === null,
-              oee: entry.oee === null
-            }
-          });
-        });
-
-        // Check if any items have performance and OEE data
-        const hasPerformanceData = result.data.some(item =>
-          item.hasOwnProperty('performance') && item.performance !== null && item.performance !== undefined);
-        const hasOEEData = result.data.some(item =>
-          item.hasOwnProperty('oee') && item.oee !== null && item.oee !== undefined);
-
-        console.log(`[API CHECK] Unit ${unitName} - Contains performance data: ${hasPerformanceData}, OEE data: ${hasOEEData}`);
-
-        updateExistingTables(unitName, result.data);
-      } else {
-        console.error(`[API ERROR] Unexpected data format:`, result.data);
-      }
+    snapshot = element ? JSON.parse(element.textContent) : null;
+  } catch (error) {
+    console.error("❌ Sayfa verisi okunamadı:", error);
+  }
+  if (!snapshot || !snapshot.data) return false;
+
+  // Aynı veri WebSocket'ten ya da yoklamadan tekrar gelirse 304 döner
+  lastFetchUrl = hourlyProductionUrl(units, startDateTime, endDateTime);
+  lastETag = snapshot.etag;
+  units.forEach((unitName) => {
+    const unitData = snapshot.data[unitName];
+    if (!unitData) return;
+    // WebSocket daha önce bağlandıysa canlı satırlar gömülü verinin üzerine yazılır
+    const liveRows = unitDataStore[unitName] || [];
+    unitDataStore[unitName] = unitData;
+    if (liveRows.length) {
+      applyLiveData({ [unitName]: liveRows });
+    } else {
+      updateExistingTables(unitName, unitData);
     }
+  });
+  return true;
+}
+
+// Tüm hatların verisini tek istekte getir
+async function fetchAllUnitData(units, startDateTime, endDateTime) {
+  if (!units.length) return;
+  try {
+    const apiUrl = hourlyProductionUrl(units, startDateTime, endDateTime);
+
+    const headers = {};
+    if (apiUrl === lastFetchUrl && lastETag) {
+      headers["If-None-Match"] = lastETag;
+    }
+    // Tarayıcı önbelleği yerine ETag'i kendimiz yönetiyoruz (304'te tablolar yeniden çizilmez)
+    const response = await fetch(apiUrl, { headers, cache: "no-store" });
+    if (response.status === 304) {
+      console.log("[DEBUG] Veri değişmedi (304)");
+      return;
+    }
+
+    const result = await response.json();
+    if (result.error) {
+      console.error("[API ERROR]", result.error);
+      return;
+    }
+    if (!result.data || typeof result.data !== 'object' || Array.isArray(result.data)) {
+      console.error(`[API ERROR] Unexpected data format:`, result.data);
+      return;
+    }
+
+    lastFetchUrl = apiUrl;
+    lastETag = response.headers.get("ETag");
+    units.forEach((unitName) => {
+      const unitData = result.data[unitName];
+      if (unitData) {
+        unitDataStore[unitName] = unitData;
+        updateExistingTables(unitName, unitData);
+      }
+    });
   } catch (error) {
-    console.error(`Error fetching data for ${unitName}:`, error);
+    console.error(`Error fetching data for ${units.join(", ")}:`, error);
   }
 }
 
@@ -463,7 +503,7 @@ function checkForNewTimePeriod() {
       const { start: adjustedStart, end: adjustedEnd } = setDateTimeForPeriod(newPeriod);
 
       // Fetch fresh data for all units with adjusted time period
-      units.forEach(unit => fetchUnitData(unit, adjustedStart, adjustedEnd));
+      fetchAllUnitData(units, adjustedStart, adjustedEnd);
 
       // Update the URL parameters to reflect the new time period
       const newUrl = new URL(window.location.href);
@@ -487,5 +527,6 @@ document.addEventListener("DOMContentLoaded", () => {
 setInterval(() => {
   const params = getQueryParams();
   const units = params.unit_name || [];
-  units.forEach(unit => fetchUnitData(unit, params.start_date[0], params.end_date[0]));
+  if (!params.start_date || !params.end_date) return;
+  fetchAllUnitData(units, params.start_date[0], params.end_date[0]);
 }, 30000);
@@ -0,0 +1,57 @@
+"""Uygulama ömrü boyunca çalışan arka plan görevleri için ortak temel sınıflar.
+
+`BackgroundTask` tek bir asyncio görevini `start` / `stop` ile yönetir;
+alt sınıf `_run`ı yazar. `PeriodicRefresh` ise `refresh(db)`i her
+`interval` saniyede DB havuzunda çalıştırır ve hatayı loglayıp devam eder
+(hat kataloğu, rollup, hedef çevrim süreleri).
+"""
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+
+from sqlalchemy.orm import Session
+
+from database import run_in_db
+
+
+class BackgroundTask(ABC):
+    _task: asyncio.Task | None = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    @abstractmethod
+    async def _run(self):
+        """Görevin gövdesi; iptal edilene kadar çalışır."""
+
+
+class PeriodicRefresh(BackgroundTask):
+    """`refresh(db)`i her `interval` saniyede çalıştıran görev; alt sınıf `refresh`i yazar."""
+
+    def __init__(self, interval: float, log: logging.Logger, error_message: str):
+        self.interval = interval
+        self.log = log
+        # Hata mesajı; tek %s hatayı alır
+        self.error_message = error_message
+
+    @abstractmethod
+    def refresh(self, db: Session):
+        """DB iş parçacığında çalışan tek yenileme."""
+
+    async def _run(self):
+        while True:
+            try:
+                await run_in_db(self.refresh)
+            except Exception as e:
+                self.log.error(self.error_message, e)
+            await asyncio.sleep(self.interval)